@@ -0,0 +1,86 @@
+"""Compares throughput and accuracy of bag-of-words (hashing, TF-IDF) and doc2vec features.
+
+Usage:
+	python -m benchmarks.bag_of_words_benchmark [--imdb DIRECTORY] [--train N] [--test N] [--engines ...]
+
+Every engine is built by features.get_feature_engine, trained on the training set and used to compute 
+features of both sets, which a LogisticRegression is then trained and evaluated on. Without --imdb, a 
+synthetic two-class corpus is used: documents of both classes share a Zipf-distributed vocabulary, and each 
+class additionally prefers its own set of topic words.
+"""
+import time
+import random
+import itertools
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from features import get_feature_engine
+
+def _synthetic_corpus(size, tokens, seed):
+	rng = random.Random(seed)
+	words = ['word{}'.format(i) for i in range(20000)]
+	weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+	topics = [['topic{}_{}'.format(label, i) for i in range(200)] for label in (0, 1)]
+	documents, labels = [], []
+	for _ in range(size):
+		label = rng.randint(0, 1)
+		document = rng.choices(words, cum_weights=weights, k=tokens)
+		for position in rng.sample(range(tokens), tokens // 20):
+			document[position] = rng.choice(topics[label])
+		documents.append(document)
+		labels.append(label)
+	return pd.Series(documents), np.array(labels)
+
+def _imdb_corpus(directory, train_size, test_size, seed):
+	from data_loader.dataset import IMDBDataset
+	from preprocessing import Preprocessor
+	train_set, test_set = IMDBDataset(directory).get_dataset(limit=max(train_size, test_size), seed=seed)
+	train_set, test_set = train_set.iloc[:train_size], test_set.iloc[:test_size]
+	preprocessor = Preprocessor({'tokenizer': 'RegexTokenizer', 'lowercase': True})
+	#Positive (rating >= 7) against negative reviews
+	return [(preprocessor.preprocess(dataset), np.asarray(dataset.label) >= 7) for dataset in (train_set, test_set)]
+
+def _run(engine_type, train, test, settings):
+	settings = dict(settings, features={'type': engine_type})
+	engine = get_feature_engine(settings)
+	start = time.perf_counter()
+	engine.train(train[0], settings)
+	train_features = engine.features(train[0])
+	test_features = engine.features(test[0])
+	seconds = time.perf_counter() - start
+	if isinstance(train_features, pd.Series):
+		train_features, test_features = np.vstack(train_features.values), np.vstack(test_features.values)
+	classifier = LogisticRegression(max_iter=1000).fit(train_features, train[1])
+	accuracy = accuracy_score(test[1], classifier.predict(test_features))
+	return seconds, (len(train[0]) + len(test[0])) / seconds, accuracy
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--imdb', metavar='DIRECTORY', help='aclImdb directory, synthetic corpus if not given')
+	parser.add_argument('--train', type=int, default=20000)
+	parser.add_argument('--test', type=int, default=5000)
+	parser.add_argument('--tokens', type=int, default=200, help='tokens per synthetic document')
+	parser.add_argument('--engines', nargs='+', default=['hashing', 'tfidf', 'doc2vec'], 
+		choices=['hashing', 'tfidf', 'doc2vec'])
+	parser.add_argument('--vector-length', type=int, default=100)
+	parser.add_argument('--epochs', type=int, default=20)
+	parser.add_argument('--seed', type=int, default=0)
+	args = parser.parse_args()
+
+	if args.imdb:
+		train, test = _imdb_corpus(args.imdb, args.train, args.test, args.seed)
+	else:
+		train = _synthetic_corpus(args.train, args.tokens, args.seed)
+		test = _synthetic_corpus(args.test, args.tokens, args.seed + 1)
+	settings = {'vector_length': args.vector_length, 'epochs': args.epochs}
+
+	print('{} training and {} test documents'.format(len(train[0]), len(test[0])))
+	for engine_type in args.engines:
+		seconds, throughput, accuracy = _run(engine_type, train, test, settings)
+		print('{:<10}{:>9.1f} s features{:>10.0f} docs/s   accuracy {:.4f}'.format(engine_type, seconds, throughput, 
+			accuracy))
+
+if __name__ == '__main__':
+	main()
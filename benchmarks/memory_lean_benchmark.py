@@ -0,0 +1,80 @@
+"""Measures memory of loading and preprocessing a corpus in default and memory-lean mode.
+
+Usage:
+	python -m benchmarks.memory_lean_benchmark [--documents N] [--tokens N] [--vocabulary N]
+
+A synthetic IMDB-shaped corpus (aclImdb/{train,test}/{pos,neg}/id_rating.txt files) is written to a 
+temporary directory, then each mode runs in a fresh process, which loads it with IMDBDataset (plus 
+compact_dataframes in memory-lean mode, as DataLoader does) and preprocesses both sets with 
+RegexTokenizer. Reported are peak RSS, RSS after preprocessing and the deep size of the dataframes.
+"""
+import os
+import sys
+import json
+import random
+import itertools
+import resource
+import argparse
+import tempfile
+import subprocess
+
+def _write_corpus(directory, documents, tokens, vocabulary, seed=0):
+	rng = random.Random(seed)
+	words = ['word{}'.format(i) for i in range(vocabulary)]
+	#Zipf-like word frequencies, as in natural text
+	weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary)))
+	for split in ('train', 'test'):
+		for polarity, ratings in (('pos', (7, 8, 9, 10)), ('neg', (1, 2, 3, 4))):
+			path = os.path.join(directory, split, polarity)
+			os.makedirs(path)
+			for i in range(documents // 2):
+				text = ' '.join(rng.choices(words, cum_weights=weights, k=tokens)).capitalize() + '.'
+				with open(os.path.join(path, '{}_{}.txt'.format(i, rng.choice(ratings))), 'w') as doc_file:
+					doc_file.write(text)
+
+def _rss_mb():
+	with open('/proc/self/statm') as statm:
+		return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+def _measure(directory, memory_lean):
+	#Runs in its own process, so that peak RSS belongs to one mode only
+	from data_loader.dataset import IMDBDataset
+	from data_loader.util import compact_dataframes
+	from preprocessing import Preprocessor
+
+	train_set, test_set = IMDBDataset(directory).get_dataset()
+	if memory_lean:
+		compact_dataframes([train_set, test_set])
+	preprocessor = Preprocessor({'tokenizer': 'RegexTokenizer', 'lowercase': True, 'memory_lean': memory_lean})
+	train_tokens = preprocessor.preprocess(train_set)
+	test_tokens = preprocessor.preprocess(test_set)
+	train_set = preprocessor.without_raw_text(train_set)
+	test_set = preprocessor.without_raw_text(test_set)
+
+	frames = sum(frame.memory_usage(deep=True).sum() for frame in (train_set, test_set)) / 2 ** 20
+	return {'peak': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 'final': _rss_mb(), 'frames': frames, 
+		'documents': len(train_tokens) + len(test_tokens)}
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--documents', type=int, default=40000, help='documents in each set')
+	parser.add_argument('--tokens', type=int, default=250, help='tokens per document')
+	parser.add_argument('--vocabulary', type=int, default=50000)
+	parser.add_argument('--measure', nargs=2, metavar=('DIRECTORY', 'MEMORY_LEAN'), help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.measure:
+		print(json.dumps(_measure(args.measure[0], args.measure[1] == '1')))
+		return
+
+	with tempfile.TemporaryDirectory() as directory:
+		_write_corpus(directory, args.documents, args.tokens, args.vocabulary)
+		for name, memory_lean in (('default', '0'), ('memory_lean', '1')):
+			output = subprocess.run([sys.executable, '-m', 'benchmarks.memory_lean_benchmark', '--measure', directory, 
+				memory_lean], check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+			result = json.loads(output.splitlines()[-1])
+			print('{:<12}{:>8.0f} MB peak{:>8.0f} MB final{:>8.0f} MB frames after preprocess ({} documents)'.format(
+				name, result['peak'], result['final'], result['frames'], result['documents']))
+
+if __name__ == '__main__':
+	main()
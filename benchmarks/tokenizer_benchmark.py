@@ -0,0 +1,103 @@
+"""Benchmarks RegexTokenizer against the NLTK based Tokenizer and WordTokenizer.
+
+Usage:
+	python -m benchmarks.tokenizer_benchmark [directory with text files] [--limit N] [--repeat N]
+
+Without a directory a synthetic corpus built from review-like sentences is used. Besides throughput, 
+the share of documents tokenized exactly like WordTokenizer is reported. Without NLTK's Punkt data 
+the reference is only available for the synthetic corpus, whose sentence boundaries are known.
+"""
+import os
+import time
+import random
+import argparse
+from nltk.tokenize import word_tokenize
+from preprocessing.tokenizers import Tokenizer, WordTokenizer, RegexTokenizer
+
+SENTENCES = [
+	"This movie was great, I loved it!",
+	"I don't know why they can't, won't or shouldn't stop making sequels.",
+	"She's the best actress we've seen in years; they'll give her an award.",
+	"The critic said \"a masterpiece\" (and he's rarely wrong).",
+	"Mr. Smith from the U.S. paid $12.50 for 2 tickets at 10:30 pm.",
+	"Well... it's a state-of-the-art production--but the plot is thin.",
+	"O'Neil, who has a Ph.D., cannot stand it & gonna leave early",
+]
+
+def _synthetic_sentences(size, seed=0):
+	rng = random.Random(seed)
+	return [[rng.choice(SENTENCES) for _ in range(rng.randint(5, 30))] for _ in range(size)]
+
+def _synthetic_corpus(size, seed=0):
+	return [" ".join(sentences) for sentences in _synthetic_sentences(size, seed)]
+
+def _read_corpus(directory, limit):
+	texts = []
+	for root, _, files in os.walk(directory):
+		for name in sorted(files):
+			with open(os.path.join(root, name), encoding="utf8", errors="ignore") as f:
+				texts.append(f.read())
+			if len(texts) >= limit:
+				return texts
+	return texts
+
+def _punkt_available():
+	try:
+		word_tokenize("Test.")
+		return True
+	except LookupError:
+		return False
+
+def _best_time(function, repeat):
+	best = float("inf")
+	for _ in range(repeat):
+		start = time.perf_counter()
+		result = function()
+		best = min(best, time.perf_counter() - start)
+	return best, result
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("directory", nargs="?")
+	parser.add_argument("--limit", type=int, default=5000)
+	parser.add_argument("--repeat", type=int, default=3)
+	args = parser.parse_args()
+
+	if args.directory:
+		texts, sentences = _read_corpus(args.directory, args.limit), None
+	else:
+		sentences = _synthetic_sentences(args.limit)
+		texts = [" ".join(document) for document in sentences]
+	regex = RegexTokenizer()
+	candidates = [
+		("Tokenizer (wordpunct_tokenize)", lambda: Tokenizer().process_batch(texts)),
+		("RegexTokenizer.process", lambda: [regex.process(text) for text in texts]),
+		("RegexTokenizer.process_batch", lambda: regex.process_batch(texts)),
+		("RegexTokenizer.process_batch(lowercase)", lambda: regex.process_batch(texts, lowercase=True)),
+		("Treebank (word_tokenize, preserve_line)", lambda: [word_tokenize(text, preserve_line=True) for text in texts]),
+	]
+	punkt = _punkt_available()
+	if punkt:
+		candidates.append(("WordTokenizer (word_tokenize)", lambda: WordTokenizer().process_batch(texts)))
+	else:
+		print("Punkt data not installed, WordTokenizer is only benchmarked through its Treebank stage.")
+
+	print("{} documents, {} characters".format(len(texts), sum(map(len, texts))))
+	results = {}
+	for name, function in candidates:
+		seconds, results[name] = _best_time(function, args.repeat)
+		print("{:<45}{:>8.3f} s{:>12.0f} docs/s".format(name, seconds, len(texts) / seconds))
+
+	if punkt:
+		reference = results["WordTokenizer (word_tokenize)"]
+	elif sentences is not None:
+		#Treebank applied sentence by sentence is what WordTokenizer does after Punkt splitting
+		reference = [[token for sentence in document for token in word_tokenize(sentence, preserve_line=True)] 
+			for document in sentences]
+	else:
+		return
+	same = sum(a == b for a, b in zip(results["RegexTokenizer.process_batch"], reference))
+	print("RegexTokenizer matches WordTokenizer on {:.1%} of documents".format(same / max(len(texts), 1)))
+
+if __name__ == "__main__":
+	main()
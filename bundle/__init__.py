@@ -0,0 +1 @@
+from bundle.bundle import PipelineBundle
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import pickle
+import shutil
+import logging
+import importlib
+import numpy as np
+from preprocessing import Preprocessor
+
+
+class _ArrayPickler(pickle.Pickler):
+    """A pickler that stores large NumPy arrays as separate raw .npy files.
+
+    Attributes:
+        _array_dir (str): directory the .npy files are written to.
+        _min_bytes (int): smaller arrays are pickled as usual.
+        arrays (list(str)): names of written .npy files.
+
+    """
+
+    def __init__(self, file, array_dir, min_bytes):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._array_dir = array_dir
+        self._min_bytes = min_bytes
+        self._saved = {}
+        self.arrays = []
+
+    def persistent_id(self, obj):
+        if not isinstance(obj, np.ndarray) or obj.dtype.hasobject or obj.nbytes < self._min_bytes:
+            return None
+
+        # Arrays shared between objects are stored once. The array itself is kept to keep its id unique.
+        if id(obj) not in self._saved:
+            name = '{:05d}.npy'.format(len(self.arrays))
+            np.save(os.path.join(self._array_dir, name), obj, allow_pickle=False)
+            self._saved[id(obj)] = (name, obj)
+            self.arrays.append(name)
+
+        return self._saved[id(obj)][0]
+
+
+class _ArrayUnpickler(pickle.Unpickler):
+    """An unpickler that loads arrays stored by _ArrayPickler, memory-mapping them if requested."""
+
+    def __init__(self, file, array_dir, mmap):
+        super().__init__(file)
+        self._array_dir = array_dir
+        self._mmap_mode = 'r' if mmap else None
+
+    def persistent_load(self, pid):
+        return np.load(os.path.join(self._array_dir, pid), mmap_mode=self._mmap_mode, allow_pickle=False)
+
+
+class PipelineBundle:
+    """A trained pipeline (preprocessing, features and classifiers) that can be exported and loaded without retraining.
+
+    A bundle is a directory containing:
+        manifest.json: format version, library versions, settings and list of array files,
+        pipeline.pkl: pickled feature engine, trainer and label mapping,
+        arrays/: large arrays (doc2vec weights, classifier coefficients, ...) as raw .npy files, which are 
+            memory-mapped on load, so that a worker cold-starts without reading them up front.
+    The Preprocessor is not pickled, it is rebuilt from the stored settings.
+
+    Attributes:
+        settings (dict): experiment description the pipeline was trained with.
+        preprocessor (preprocessing.Preprocessor): the preprocessor.
+        feature_engine (Doc2VecWrapper or BagOfWordsWrapper): the trained feature engine.
+        trainer (trainer.Trainer): the trainer with fitted estimators.
+        label_mapping (list): label names of integer-coded labels (e.g. categories of a memory-lean label 
+            column), if any.
+
+    """
+
+    FORMAT_VERSION = 1
+
+    # Settings that must match between the bundle and a worker loading it.
+    COMPATIBILITY_KEYS = ('tokenizer', 'lowercase', 'lematization', 'stemming', 'stopwords_remove', 
+        'vector_length', 'features', 'models')
+
+    def __init__(self, settings, preprocessor, feature_engine, trainer, label_mapping=None):
+        self.settings = settings
+        self.preprocessor = preprocessor
+        self.feature_engine = feature_engine
+        self.trainer = trainer
+        self.label_mapping = label_mapping
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @staticmethod
+    def _library_versions():
+        versions = {}
+        for library in ('numpy', 'scipy', 'sklearn', 'gensim'):
+            try:
+                versions[library] = importlib.import_module(library).__version__
+            except ImportError:
+                versions[library] = None
+
+        return versions
+
+    def export(self, path, overwrite=False, min_array_bytes=1024):
+        """Writes the bundle directory.
+
+        The bundle is written to a temporary directory first and moved into place once complete.
+
+        Args:
+            path (str): the bundle directory.
+            overwrite (bool): whether an existing bundle at path may be replaced.
+            min_array_bytes (int): arrays of at least this size are stored as .npy files.
+
+        """
+        if os.path.exists(path) and not overwrite:
+            raise FileExistsError('Bundle \'{}\' already exists.'.format(path))
+
+        tmp_path = path.rstrip(os.sep) + '.tmp'
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        array_dir = os.path.join(tmp_path, 'arrays')
+        os.makedirs(array_dir)
+
+        with open(os.path.join(tmp_path, 'pipeline.pkl'), 'wb') as pipeline_file:
+            pickler = _ArrayPickler(pipeline_file, array_dir, min_array_bytes)
+            pickler.dump({'feature_engine': self.feature_engine, 'trainer': self.trainer, 
+                'label_mapping': self.label_mapping})
+
+        manifest = {
+            'format_version': self.FORMAT_VERSION,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'libraries': self._library_versions(),
+            'settings': self.settings,
+            'arrays': pickler.arrays,
+        }
+        with open(os.path.join(tmp_path, 'manifest.json'), 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=1)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.rename(tmp_path, path)
+        self.logger.info('Bundle exported to %s (%d array files).', path, len(pickler.arrays))
+
+    @classmethod
+    def _check_compatibility(cls, bundle_settings, settings):
+        """Raises ValueError if settings of a worker differ from the bundle ones in any COMPATIBILITY_KEYS."""
+        mismatches = [key for key in cls.COMPATIBILITY_KEYS if bundle_settings.get(key) != settings.get(key)]
+        if mismatches:
+            err_msg = 'Settings are incompatible with the bundle. Mismatched settings:\n'
+            err_msg += '\n'.join('\'{}\': bundle {!r}, given {!r}'.format(key, bundle_settings.get(key), 
+                settings.get(key)) for key in mismatches)
+            raise ValueError(err_msg)
+
+    @classmethod
+    def load(cls, path, settings=None, mmap=True):
+        """Loads a bundle exported with export method.
+
+        Args:
+            path (str): the bundle directory.
+            settings (dict): experiment description of the worker. If given, it is validated against 
+                the bundle settings.
+            mmap (bool): whether the arrays are memory-mapped (read-only) instead of read into memory.
+        Returns:
+            bundle (PipelineBundle): the loaded pipeline.
+
+        """
+        with open(os.path.join(path, 'manifest.json'), 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+
+        if manifest.get('format_version') != cls.FORMAT_VERSION:
+            raise ValueError('Unsupported bundle format version {}, expected {}.'.format(
+                manifest.get('format_version'), cls.FORMAT_VERSION))
+        if settings is not None:
+            cls._check_compatibility(manifest['settings'], settings)
+
+        logger = logging.getLogger(cls.__name__)
+        for library, version in cls._library_versions().items():
+            if manifest['libraries'].get(library) != version:
+                logger.warning('Bundle was exported with %s %s, but %s is installed.', library, 
+                    manifest['libraries'].get(library), version)
+
+        with open(os.path.join(path, 'pipeline.pkl'), 'rb') as pipeline_file:
+            pipeline = _ArrayUnpickler(pipeline_file, os.path.join(path, 'arrays'), mmap).load()
+
+        preprocessor = Preprocessor(manifest['settings'])
+
+        return cls(manifest['settings'], preprocessor, pipeline['feature_engine'], pipeline['trainer'], 
+            pipeline['label_mapping'])
+
+    def predict(self, df):
+        """Returns predictions of all trained models for given documents.
+
+        Args:
+            df (pandas.DataFrame): dataframe with a 'document' column.
+        Returns:
+            predictions (list(trainer.Predicted)): predictions of every model.
+
+        """
+        prep_dataset = self.preprocessor.preprocess(df)
+        vector = self.feature_engine.features(prep_dataset)
+
+        return self.trainer.predict(vector)
@@ -0,0 +1 @@
+# Makes the top-level packages importable when pytest is run from the repository root.
@@ -2,6 +2,7 @@ import os
 import logging
 import pandas as pd
 from data_loader.dataset import IMDBDataset, LingspamDataset, News20Dataset, ReutersDataset
+from data_loader.util import compact_dataframes
 
 logging.basicConfig(level=logging.INFO)
 
@@ -36,6 +37,11 @@ class DataLoader:
    
     def load_dataset(self, settings):
         """Returns  given dataset split between training and test set.
+
+        Optional 'limit' (maximal number of documents per set), 'sample_fraction' (fraction of documents 
+        kept in each set) and 'seed' settings load a label-stratified random sample of the dataset, 
+        without reading the rest of it. With 'memory_lean' setting enabled, documents are stored as 
+        Arrow-backed strings and labels as categorical codes (see data_loader.util.compact_dataframes).
         
         Args:
             settings (dict): experiment description. 
@@ -55,7 +61,13 @@ class DataLoader:
         dataset_name = settings['dataset']
 
         if dataset_name in self._datasets.keys():
-            return self._datasets[dataset_name].get_dataset()
+            sampling = {key: settings[key] for key in ('limit', 'sample_fraction', 'seed') if key in settings}
+            train_set, test_set = self._datasets[dataset_name].get_dataset(**sampling)
+            
+            if settings.get('memory_lean', False):
+                compact_dataframes([train_set, test_set])
+
+            return train_set, test_set
         else:
             dataset_names = self._datasets.keys()
             dataset_names = ['\'' + name + '\'' for name in dataset_names]
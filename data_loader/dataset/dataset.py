@@ -1,9 +1,9 @@
 import os
 import logging
 import pandas as pd
-import multiprocessing as mp
 from abc import ABC, abstractmethod
-from data_loader.util import get_files_from_dir
+from data_loader.util import get_files_from_dir, stratified_sample
+from data_loader.ingestion import IngestionEngine
 
 
 class Dataset(ABC):
@@ -22,14 +22,19 @@ class Dataset(ABC):
         else:
             raise FileNotFoundError('Data directory not found.')
 
-    def _get_file_paths(self):
+    def _get_file_paths(self, limit=None, sample_fraction=None, seed=None):
         """Returns paths to files that make up training and test set, respectively.
         
         This method is provided here only as a reference, because it is called in get_dataset method below. 
         It is not mandatory if your get_dataset method does not need it. However, when it does (e.g. because 
         you call super method in get_dataset), then this method must be implemented in your derived class 
-        in accordance with the dataset structure.
+        in accordance with the dataset structure. Sampling arguments should be applied to each set with 
+        _sample_file_paths method below.
 
+        Args:
+            limit (int): maximal number of files in each set.
+            sample_fraction (float): fraction of files to keep in each set.
+            seed (int): random seed for sampling.
         Returns:
             train_set_paths (list(str)): paths to training data files.
             test_set_paths (list(str)): paths to test data files.
@@ -38,25 +43,60 @@ class Dataset(ABC):
         raise NotImplementedError('_get_file_paths method must be implemented!')        
 
     @staticmethod
-    def _load_single_file(path):
-        """Loads a single file from given dataset.
+    def _get_label(path):
+        """Returns label of a document based on its file path only.
+
+        This method is provided here only as a reference, because it is called in _sample_file_paths method 
+        below. It must be implemented in your derived class if file paths are sampled.
+
+        Args:
+            path (str): path to the data file.
+        Returns:
+            label (type): label of the document.
 
-        This method is provided here only as a reference, because it is called in _build_dataframe method below. 
-        It is not mandatory unless you use some of below implementations (e.g. you call super method in your
-        get_dataset method). In that case this method must be implemented in your derived class in accordance with 
-        the dataset structure.
+        """
+        raise NotImplementedError('_get_label method must be implemented!')
+
+    def _sample_file_paths(self, file_paths, limit=None, sample_fraction=None, seed=None):
+        """Returns a label-stratified random subset of given file paths, without reading the files.
+
+        Args:
+            file_paths (list(str)): paths to data files of one set.
+            limit (int): maximal number of files to keep. If None, it is not limited.
+            sample_fraction (float): fraction of files to keep. If None, all are kept.
+            seed (int): random seed for sampling.
+        Returns:
+            file_paths (list(str)): the selected paths, in their original order.
+
+        """
+        if limit is None and sample_fraction is None:
+            return file_paths
+
+        labels = [self._get_label(path) for path in file_paths]
+
+        return stratified_sample(file_paths, labels, limit, sample_fraction, seed)
+
+    @staticmethod
+    def _parse_single_file(path, content):
+        """Parses a single, already read file from given dataset.
+
+        This method is provided here only as a reference, because _build_dataframe and get_dataset methods 
+        below pass it to the IngestionEngine. It is not mandatory unless you use some of below implementations 
+        (e.g. you call super method in your get_dataset method). In that case this method must be implemented 
+        in your derived class in accordance with the dataset structure.
         
         Args:
-            path (str): path to the file to be loaded.       
+            path (str): path to the file.
+            content (str): content of the file.
         Returns:
             content (str): content of the document.
             label (type): label of the document.
  
         """
-        raise NotImplementedError('_load_single_file method must be implemented!')
- 
+        raise NotImplementedError('_parse_single_file method must be implemented!')
+
     @classmethod
-    def _build_dataframe(cls, file_paths):
+    def _build_dataframe(cls, file_paths, engine=None):
         """Builds appropriate dataframe from all given data files.
 
         This implementation is provided for datasets that are composed of many individual data files and 
@@ -65,29 +105,28 @@ class Dataset(ABC):
 
         Args:
             file_paths (list(str)): paths to all data files we want to wrap as a dataframe.
-            workers (int): number of processes to be spawned to build the dataframe.            
+            engine (data_loader.ingestion.IngestionEngine): engine used to load the files. Pass the same 
+                engine for all splits to reuse its workers; if None, a temporary one is used.
         Returns:
             dataframe (pandas.DataFrame): the resulting dataframe.            
        
          """
-        # Get file contents and labels in parallel.
-        chunksize = int(len(file_paths) / mp.cpu_count())
+        if engine is None:
+            with IngestionEngine(cls._parse_single_file) as engine:
+                return cls._build_dataframe(file_paths, engine)
 
-        pool = mp.Pool(processes=mp.cpu_count())              
-        results = pool.map(cls._load_single_file, file_paths, chunksize)
+        # Get file contents and labels straight into columns.
+        documents, labels = engine.load(file_paths)
 
-        pool.close()
-        pool.join()
-   
         # Build the dataframe.           
         data_dict = {}
-        data_dict['document'] = [res[0] for res in results]         
-        data_dict['label'] = [res[1] for res in results]       
+        data_dict['document'] = documents
+        data_dict['label'] = labels
 
         return pd.DataFrame.from_dict(data_dict)
 
     @abstractmethod 
-    def get_dataset(self):
+    def get_dataset(self, limit=None, sample_fraction=None, seed=None):
         """Returns given dataset. 
         
         This implementation is provided for datasets that are composed of many individual data files and 
@@ -95,17 +134,22 @@ class Dataset(ABC):
         fine grained split is necessary, then it should be performed at data level and implemented differently.
         Subclasses must implement this method.
  
+        Args:
+            limit (int): maximal number of documents in each set.
+            sample_fraction (float): fraction of documents to keep in each set.
+            seed (int): random seed for sampling.
         Returns:
             train_set (pandas.DataFrame): training set dataframe.
             test_set (pandas.DataFrame): test set dataframe.
 
         """                
         # Get lists of file paths for training and test sets, respectively.
-        train_set_paths, test_set_paths = self._get_file_paths()        
+        train_set_paths, test_set_paths = self._get_file_paths(limit, sample_fraction, seed)        
 
-        # Build appropriate dataframes. 
-        train_set = self._build_dataframe(train_set_paths)
-        test_set = self._build_dataframe(test_set_paths) 
+        # Build appropriate dataframes, sharing the ingestion workers between them. 
+        with IngestionEngine(self._parse_single_file) as engine:
+            train_set = self._build_dataframe(train_set_paths, engine)
+            test_set = self._build_dataframe(test_set_paths, engine) 
 
         return train_set, test_set            
 
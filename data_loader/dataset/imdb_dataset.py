@@ -9,9 +9,13 @@ class IMDBDataset(Dataset):
     def __init__(self, data_path):
         super().__init__(data_path)
 
-    def _get_file_paths(self):
+    def _get_file_paths(self, limit=None, sample_fraction=None, seed=None):
         """Returns paths to files that make up training and test set, respectively.
 
+        Args:
+            limit (int): maximal number of files in each set.
+            sample_fraction (float): fraction of files to keep in each set.
+            seed (int): random seed for sampling.
         Returns:
             train_set_paths (list(str)): paths to training data files.
             test_set_paths (list(str)): paths to test data files.
@@ -26,49 +30,62 @@ class IMDBDataset(Dataset):
 
         train_set_paths = files_list[0] + files_list[1]
         test_set_paths = files_list[2] + files_list[3] 
+
+        # Sample the files before any of them is read.
+        train_set_paths = self._sample_file_paths(train_set_paths, limit, sample_fraction, seed)
+        test_set_paths = self._sample_file_paths(test_set_paths, limit, sample_fraction, seed)
         
         return train_set_paths, test_set_paths
 
     @staticmethod
-    def _load_single_file(path):
-        """Loads a single file from IMDB dataset.
+    def _get_label(path):
+        """Returns label (rating) of an IMDB review, encoded in its file name."""
+        name = os.path.basename(path)
+        
+        number, rating = name.split('_')
+
+        return int(rating[:-4])
+
+    @staticmethod
+    def _parse_single_file(path, content):
+        """Parses a single file from IMDB dataset.
         
         Args:
-            path (str): path to the file to be loaded.       
+            path (str): path to the file.       
+            content (str): content of the file.
         Returns:
             content (str): content of the document.
             label (int): label of the document.
  
         """
-        name = os.path.basename(path)
-        
-        number, rating = name.split('_')
-        label = int(rating[:-4])
-               
-        with open(path, 'r', encoding='utf8', errors='ignore') as doc_file:
-            content = doc_file.read()
+        label = IMDBDataset._get_label(path)
 
         return content, label 
 
     @classmethod
-    def _build_dataframe(cls, file_paths):
+    def _build_dataframe(cls, file_paths, engine=None):
         """Builds appropriate dataframe from all given data files.
 
         Args:
             file_paths (list(str)): paths to all data files we want to wrap as a dataframe. 
+            engine (data_loader.ingestion.IngestionEngine): engine used to load the files.
         Returns:
             dataframe (pandas.DataFrame): the resulting dataframe.            
 
         """
-        return super()._build_dataframe(file_paths)        
+        return super()._build_dataframe(file_paths, engine)        
         
-    def get_dataset(self):
+    def get_dataset(self, limit=None, sample_fraction=None, seed=None):
         """Returns IMDB movie reviews dataset.
        
+        Args:
+            limit (int): maximal number of documents in each set.
+            sample_fraction (float): fraction of documents to keep in each set.
+            seed (int): random seed for sampling.
         Returns:
             train_set (pandas.DataFrame): training set dataframe.
             test_set (pandas.DataFrame): test set dataframe.
 
         """                
-        return super().get_dataset()
+        return super().get_dataset(limit, sample_fraction, seed)
  
@@ -6,7 +6,7 @@ import multiprocessing as mp
 from lxml import etree
 from operator import itemgetter
 from data_loader.dataset.dataset import Dataset
-from data_loader.util import get_files_from_dir
+from data_loader.util import get_files_from_dir, label_indicator, stratified_sample
 
 
 class BlockProducer(mp.Process):
@@ -18,14 +18,16 @@ class BlockProducer(mp.Process):
         _num_consumer (int): how many BlockConsumer objects are spawned.
         _file_paths (list(str)): paths to data files to process.
         _task_queue (mp.Queue): the output queue containing <REUTERS> blocks.
+        _selected (set(int)): indices of blocks to be pushed (all blocks, if None).
      
     """
 
-    def __init__(self, num_consumers, file_paths, task_queue):
+    def __init__(self, num_consumers, file_paths, task_queue, selected=None):
         super().__init__()
         self._num_consumer = num_consumers
         self._file_paths = file_paths
         self._task_queue = task_queue
+        self._selected = selected
 
     def run(self):
         # Indices are necessary for train/test split to be consistent from run to run.
@@ -39,7 +41,8 @@ class BlockProducer(mp.Process):
             # Get <REUTERS> blocks from given file and push them to output queue.
             blocks = re.findall(r'<REUTERS.*?<\/REUTERS>', file_content, re.DOTALL)            
             for block in blocks:
-                self._task_queue.put((idx, block))
+                if self._selected is None or idx in self._selected:
+                    self._task_queue.put((idx, block))
                 idx += 1
 
         # Send poison pills to BlockConsumers.
@@ -126,13 +129,13 @@ class BlockConsumer(mp.Process):
 class ResultConsumer(mp.Process):
     """A consumer class for (document, labels) pairs.
     
-    ResultConsumer gets (document, labels) pairs from an input queue and appends them to a 
-    results list. 
+    ResultConsumer gets (document, labels) pairs from an input queue and appends them, together with 
+    indices of their blocks, to a results list. 
      
     Attributes:
         _num_consumer (int): how many BlockConsumer objects are spawned.
         _result_queue (mp.Queue): the input queue containing (document, labels) pairs. 
-        _results_list (list): the list of (document, labels) pairs to be returned.
+        _results_list (list): the list of (block index, (document, labels)) pairs to be returned.
         _conn (mp.connection.Connection): one end of a pipe to send results to main thread.
 
     """
@@ -159,7 +162,6 @@ class ResultConsumer(mp.Process):
 
         # Restore the order and send the results back to the main thread.
         self._results_list.sort(key=itemgetter(0))
-        self._results_list = [item[1] for item in self._results_list]
         self._conn.send(self._results_list)
         self._conn.close()
 
@@ -167,6 +169,13 @@ class ResultConsumer(mp.Process):
 class ReutersDataset(Dataset):
     """A wrapper class for Reuters-21578 dataset."""
 
+    _block_pattern = re.compile(r'<REUTERS.*?<\/REUTERS>', re.DOTALL)
+    _topics_pattern = re.compile(r'<TOPICS>(.*)<\/TOPICS>', re.DOTALL)
+    _topic_pattern = re.compile(r'<D>(.*?)<\/D>', re.DOTALL)
+    _body_pattern = re.compile(r'<BODY>(.*)<\/BODY>', re.DOTALL)
+    _element_pattern = re.compile(r'<(\w+)[^>]*>.*?<\/\1\s*>', re.DOTALL)
+    _tag_pattern = re.compile(r'<[^>]*>')
+
     def __init__(self, data_path):
         super().__init__(data_path) 
 
@@ -177,14 +186,84 @@ class ReutersDataset(Dataset):
         
         return file_paths
 
-    def _get_results(self, file_paths):
+    @classmethod
+    def _scan_block(cls, block):
+        """Returns labels of a block if BlockConsumer would keep it, else None, with regular expressions only.
+
+        It mirrors BlockConsumer._process_data: there must be at least one non-empty <D> topic and text 
+        directly inside <BODY> (text of nested elements does not count).
+        """
+        topics = cls._topics_pattern.search(block)
+        labels = tuple(label for label in cls._topic_pattern.findall(topics.group(1)) if label) if topics else ()
+        if not labels:
+            return None
+
+        body = cls._body_pattern.search(block)
+        text = cls._tag_pattern.sub('', cls._element_pattern.sub('', body.group(1))) if body else ''
+
+        return labels if text else None
+
+    def _get_block_labels(self, file_paths):
+        """Returns indices and labels of blocks that contain labeled documents.
+
+        This is a quick scan with regular expressions only, used to sample blocks before they are parsed. 
+        Blocks are selected by the same rule BlockConsumer applies after parsing (see _scan_block), so the 
+        train/test split point is the same as when all blocks are parsed. Block indices are the same as 
+        in BlockProducer.
+
+        Args:
+            file_paths (list(str)): paths to data files.
+        Returns:
+            blocks (list(tuple(int, tuple(str)))): pairs (block index, block labels).
+
+        """
+        blocks = []
+        idx = 0
+
+        for path in file_paths:
+            with open(path, 'r', encoding='utf8', errors='ignore') as doc_file:
+                file_content = doc_file.read()
+
+            for block in self._block_pattern.findall(file_content):
+                labels = self._scan_block(block)
+                if labels is not None:
+                    blocks.append((idx, labels))
+                idx += 1
+
+        return blocks
+
+    def _sample_blocks(self, file_paths, limit=None, sample_fraction=None, seed=None):
+        """Returns indices of label-stratified samples of training and test blocks.
+
+        Args:
+            file_paths (list(str)): paths to data files.
+            limit (int): maximal number of blocks in each set.
+            sample_fraction (float): fraction of blocks to keep in each set.
+            seed (int): random seed for sampling.
+        Returns:
+            train_blocks (list(int)): indices of selected training blocks.
+            test_blocks (list(int)): indices of selected test blocks.
+
+        """
+        train_blocks, test_blocks = self._split(self._get_block_labels(file_paths))
+
+        samples = []
+        for blocks in (train_blocks, test_blocks):
+            indices = [idx for idx, _ in blocks]
+            labels = [labels for _, labels in blocks]
+            samples.append(stratified_sample(indices, labels, limit, sample_fraction, seed))
+
+        return samples[0], samples[1]
+
+    def _get_results(self, file_paths, selected=None):
         """Returns all found documents with corresponding labels.
 
         Args:
             file_paths (list(str)): paths to data files.
+            selected (set(int)): indices of blocks to be parsed (all blocks, if None).
         Returns:
-            results (list(tuple(str, tuple(str))): pairs (document, document labels) obtained 
-                from given data.
+            results (list(tuple(int, tuple(str, tuple(str)))): pairs (block index, (document, document labels)) 
+                obtained from given data, ordered by block index.
 
         """        
         # Initialize communication objects.
@@ -195,7 +274,7 @@ class ReutersDataset(Dataset):
         # Initialize and start all workers.
         self.logger.info('Initializing workers...')
         num_consumers = mp.cpu_count() 
-        block_producer = BlockProducer(num_consumers, file_paths, tasks)
+        block_producer = BlockProducer(num_consumers, file_paths, tasks, selected)
         block_consumers = [BlockConsumer(tasks, results) for _ in range(num_consumers)]
         result_consumer = ResultConsumer(num_consumers, results, child_conn)
 
@@ -243,9 +322,13 @@ class ReutersDataset(Dataset):
 
         return pd.DataFrame.from_dict(data_dict)
 
-    def get_dataset(self):
+    def get_dataset(self, limit=None, sample_fraction=None, seed=None):
         """Returns Reuters dataset.
        
+        Args:
+            limit (int): maximal number of documents in each set.
+            sample_fraction (float): fraction of documents to keep in each set.
+            seed (int): random seed for sampling.
         Returns:
             train_set (pandas.DataFrame): training set dataframe.
             test_set (pandas.DataFrame): test set dataframe.
@@ -254,17 +337,38 @@ class ReutersDataset(Dataset):
         # Get list of all data file paths. 
         file_paths = self._get_file_paths() 
 
-        # Get list of all documents with corresponding labels.
-        results = self._get_results(file_paths)  
-        self.logger.info('Documents retrieved.')
+        if limit is None and sample_fraction is None:
+            # Get list of all documents with corresponding labels.
+            results = self._get_results(file_paths)  
+            results = [result for _, result in results]
+            self.logger.info('Documents retrieved.')
 
-        # Split the results between training and test sets.
-        train_results, test_results = self._split(results)
+            # Split the results between training and test sets.
+            train_results, test_results = self._split(results)
+        else:
+            # Split and sample at block level, so that only the selected blocks are parsed.
+            train_blocks, test_blocks = self._sample_blocks(file_paths, limit, sample_fraction, seed)
+            results = self._get_results(file_paths, set(train_blocks + test_blocks))
+            self.logger.info('Documents retrieved.')
+
+            if len(results) < len(train_blocks) + len(test_blocks):
+                # Only possible where the regular expression scan and the HTML parser disagree on a block.
+                self.logger.warning('%d sampled blocks contained no document after parsing, the sample is smaller.', 
+                    len(train_blocks) + len(test_blocks) - len(results))
+
+            train_blocks = set(train_blocks)
+            train_results = [result for idx, result in results if idx in train_blocks]
+            test_results = [result for idx, result in results if idx not in train_blocks]
 
         # Build appropriate dataframes. 
         train_set = self._build_dataframe(train_results)
         test_set = self._build_dataframe(test_results) 
         self.logger.info('Dataframes built.')
 
+        # Binarize the topics once, so that training and evaluation reuse the same sparse indicators.
+        _, classes = label_indicator(train_set)
+        label_indicator(test_set, classes)
+        self.logger.info('Label indicators built.')
+
         return train_set, test_set            
  
@@ -0,0 +1,182 @@
+import os
+import time
+import logging
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+
+# Readahead hints are only available on POSIX systems.
+_FADVISE = getattr(os, 'posix_fadvise', None)
+_WILLNEED = getattr(os, 'POSIX_FADV_WILLNEED', None)
+
+
+def _decode(raw):
+    """Decodes raw file bytes the same way open(path, 'r', encoding='utf8', errors='ignore') does."""
+    content = raw.decode('utf8', errors='ignore')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+
+    return content
+
+
+def _open_files_limit():
+    """Returns the soft limit of open file descriptors of the process, None if unknown or unlimited."""
+    if resource is None:
+        return None
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+    return None if soft == resource.RLIM_INFINITY else soft
+
+
+def _read_batch(paths, max_open=16):
+    """Returns raw contents of given files.
+
+    Files are opened in groups of at most max_open, and the OS is hinted to read a whole group ahead 
+    before it is read.
+    """
+    raws = []
+    for start in range(0, len(paths), max_open):
+        files = []
+        try:
+            for path in paths[start:start + max_open]:
+                files.append(open(path, 'rb'))
+            if _FADVISE is not None:
+                for doc_file in files:
+                    _FADVISE(doc_file.fileno(), 0, 0, _WILLNEED)
+            raws.extend(doc_file.read() for doc_file in files)
+        finally:
+            for doc_file in files:
+                doc_file.close()
+
+    return raws
+
+
+def _parse_batch(parse, paths, raws):
+    """Decodes and parses raw contents of a batch of files into (documents, labels) columns.
+
+    Args:
+        parse (callable): parse(path, content) -> (document, label), e.g. Dataset._parse_single_file.
+        paths (list(str)): paths to files in the batch.
+        raws (list(bytes)): raw contents of the files.
+    Returns:
+        documents (list(str)): contents of the documents.
+        labels (list): labels of the documents.
+
+    """
+    documents = []
+    labels = []
+    for path, raw in zip(paths, raws):
+        document, label = parse(path, _decode(raw))
+        documents.append(document)
+        labels.append(label)
+
+    return documents, labels
+
+
+def _load_batch(parse, paths, max_open):
+    """Reads and parses a batch of files, see _read_batch and _parse_batch."""
+    return _parse_batch(parse, paths, _read_batch(paths, max_open))
+
+
+class IngestionEngine:
+    """A reusable engine loading file-per-document datasets into columnar buffers.
+
+    The engine keeps one executor alive for all the splits it loads. Files are read in batches, 
+    and the executor kind is chosen from the first batch, which is loaded in the calling thread 
+    and timed: if decoding and parsing (which hold the GIL) take most of the time, processes are 
+    used, otherwise (the common I/O- and syscall-bound case) threads are, which avoids pickling 
+    documents back.
+    Use it as a context manager, or call close() when done.
+
+    Attributes:
+        _parse (callable): parse(path, content) -> (document, label).
+        _batch_size (int): maximal number of files read in one batch.
+        _parse_bound_ratio (float): share of time spent decoding and parsing above which processes are used.
+        _min_process_files (int): smaller inputs are always loaded with threads.
+        _max_open (int): maximal number of files a worker keeps open at once. Half of the process's open 
+            files limit is shared by all workers, the other half is left to the rest of the program.
+        _executor (concurrent.futures.Executor): the executor shared across loads, created lazily.
+
+    """
+
+    def __init__(self, parse, batch_size=64, parse_bound_ratio=0.7, min_process_files=10000):
+        self._parse = parse
+        self._batch_size = batch_size
+        self._parse_bound_ratio = parse_bound_ratio
+        self._min_process_files = min_process_files
+        limit = _open_files_limit()
+        workers = 4 * mp.cpu_count()
+        self._max_open = batch_size if limit is None else max(1, min(batch_size, limit // 2 // workers))
+        self._executor = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Shuts down the shared executor."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _batches(self, file_paths, workers):
+        # Enough batches to keep all workers busy, but never empty ones.
+        batch_size = max(1, min(self._batch_size, -(-len(file_paths) // (4 * workers))))
+        return [file_paths[i:i + batch_size] for i in range(0, len(file_paths), batch_size)]
+
+    def _start_executor(self, parse_ratio, num_files):
+        cores = mp.cpu_count()
+        if parse_ratio > self._parse_bound_ratio and num_files >= self._min_process_files:
+            self.logger.info('Parse-bound workload (%.0f%% of time parsing), using %d processes.', 
+                100 * parse_ratio, cores)
+            self._executor = ProcessPoolExecutor(max_workers=cores)
+        else:
+            self.logger.info('I/O-bound workload (%.0f%% of time parsing), using %d threads.', 
+                100 * parse_ratio, 4 * cores)
+            self._executor = ThreadPoolExecutor(max_workers=4 * cores)
+
+    def load(self, file_paths):
+        """Loads given files.
+
+        Args:
+            file_paths (list(str)): paths to data files.
+        Returns:
+            documents (list(str)): contents of the documents, in file_paths order.
+            labels (list): labels of the documents, in file_paths order.
+
+        """
+        documents = []
+        labels = []
+        if not file_paths:
+            return documents, labels
+
+        batches = self._batches(file_paths, mp.cpu_count())
+
+        if self._executor is None:
+            # Measure the workload on the first batch.
+            start = time.perf_counter()
+            raws = _read_batch(batches[0], self._max_open)
+            read_time = time.perf_counter() - start
+            batch_documents, batch_labels = _parse_batch(self._parse, batches[0], raws)
+            total_time = time.perf_counter() - start
+            documents.extend(batch_documents)
+            labels.extend(batch_labels)
+            batches = batches[1:]
+            parse_ratio = (total_time - read_time) / total_time if total_time > 0 else 0.0
+            self._start_executor(parse_ratio, len(file_paths))
+
+        parses = [self._parse] * len(batches)
+        max_opens = [self._max_open] * len(batches)
+        for batch_documents, batch_labels in self._executor.map(_load_batch, parses, batches, max_opens):
+            documents.extend(batch_documents)
+            labels.extend(batch_labels)
+
+        return documents, labels
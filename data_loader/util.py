@@ -1,4 +1,9 @@
 import os
+import random
+import logging
+import pandas as pd
+from collections import OrderedDict
+from sklearn.preprocessing import MultiLabelBinarizer
 
 
 def get_files_from_dir(dir_path):
@@ -18,3 +23,154 @@ def get_files_from_dir(dir_path):
 
     return file_paths
 
+
+def stratified_sample(items, labels, limit=None, sample_fraction=None, seed=None):
+    """Returns a random subset of given items, keeping label proportions.
+
+    Every label gets its proportional share of the sample (largest remainder rounding), and the 
+    selected items are returned in their original order.
+
+    Args:
+        items (list): items to sample from (e.g. file paths).
+        labels (list): label of each item (must be hashable).
+        limit (int): maximal number of items to return. If None, it is not limited.
+        sample_fraction (float): fraction of items to return, from (0, 1], at least one item. If None, all are kept.
+        seed (int): random seed, for reproducible samples.
+    Returns:
+        sample (list): the selected items.
+
+    """
+    if limit is not None and limit < 0:
+        raise ValueError('limit must be non-negative, got {}.'.format(limit))
+    if sample_fraction is not None and not 0 < sample_fraction <= 1:
+        raise ValueError('sample_fraction must be in (0, 1], got {}.'.format(sample_fraction))
+
+    size = len(items)
+    if sample_fraction is not None:
+        # A positive fraction of a non-empty set keeps at least one item.
+        size = max(1, int(round(sample_fraction * len(items)))) if len(items) else 0
+    if limit is not None:
+        size = min(size, limit)
+    if size >= len(items):
+        return list(items)
+
+    # Group item positions by label.
+    groups = OrderedDict()
+    for position, label in enumerate(labels):
+        groups.setdefault(label, []).append(position)
+
+    # Allocate the sample proportionally, distributing the remainder by the largest fractions.
+    quotas = OrderedDict((label, size * len(positions) / len(items)) for label, positions in groups.items())
+    counts = OrderedDict((label, int(quota)) for label, quota in quotas.items())
+    remainder = size - sum(counts.values())
+    for label in sorted(quotas, key=lambda label: counts[label] - quotas[label])[:remainder]:
+        counts[label] += 1
+
+    rng = random.Random(seed)
+    chosen = [position for label, positions in groups.items() for position in rng.sample(positions, counts[label])]
+
+    return [items[position] for position in sorted(chosen)]
+
+
+def is_multilabel(labels):
+    """Returns True if given labels are label collections (e.g. Reuters topic tuples).
+
+    Args:
+        labels (pandas.Series): labels column of a dataset dataframe.
+    Returns:
+        multilabel (bool): whether documents may carry more than one label.
+
+    """
+    return len(labels) > 0 and isinstance(labels.iloc[0], (tuple, list, set, frozenset))
+
+
+class LabelIndicator:
+    """A cached sparse label-indicator matrix for a multi-label dataframe.
+
+    Instances are immutable, so dataframes derived from the one holding the cache (pandas copies
+    `attrs` on slicing) share it instead of deep-copying the matrix. The cache is only used when 
+    the dataframe index still matches the index it was computed for.
+
+    Attributes:
+        index (pandas.Index): index of the dataframe the matrix was computed for.
+        classes (tuple): label names corresponding to matrix columns.
+        matrix (scipy.sparse.csr_matrix): (documents x classes) binary indicator matrix.
+
+    """
+
+    def __init__(self, index, classes, matrix):
+        self.index = index
+        self.classes = classes
+        self.matrix = matrix
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def label_indicator(dataframe, classes=None):
+    """Returns sparse label-indicator matrix of a multi-label dataframe, computing it at most once.
+
+    The result is cached in `dataframe.attrs`, so repeated calls (e.g. from Trainer and 
+    MetricEvaluator) do not binarize the labels again.
+
+    Args:
+        dataframe (pandas.DataFrame): dataset dataframe with a 'label' column of label tuples.
+        classes (sequence): label names to be used as matrix columns. If None, all labels found 
+            in the dataframe are used (sorted).
+    Returns:
+        matrix (scipy.sparse.csr_matrix): (documents x classes) binary indicator matrix.
+        classes (tuple): label names corresponding to matrix columns.
+
+    """
+    cached = dataframe.attrs.get('label_indicator')
+    if cached is not None and cached.index.equals(dataframe.index):
+        if classes is None or tuple(classes) == cached.classes:
+            return cached.matrix, cached.classes
+
+    binarizer = MultiLabelBinarizer(classes=classes, sparse_output=True)
+    matrix = binarizer.fit_transform(dataframe.label).tocsr()
+    classes = tuple(binarizer.classes_)
+    
+    dataframe.attrs['label_indicator'] = LabelIndicator(dataframe.index, classes, matrix)
+
+    return matrix, classes
+
+
+def compact_dataframes(dataframes):
+    """Converts dataset dataframes in place into a memory-lean representation.
+
+    Documents are stored as Arrow-backed strings (if pyarrow is installed) and labels as a categorical 
+    column, i.e. integer codes plus a single mapping (`label.cat.categories`) shared by all given 
+    dataframes, so that codes are consistent between training and test sets.
+
+    Args:
+        dataframes (list(pandas.DataFrame)): dataset dataframes, e.g. training and test sets.
+
+    """
+    try:
+        import pyarrow
+        string_dtype = 'string[pyarrow]'
+    except ImportError:
+        logging.getLogger(__name__).warning('pyarrow is not installed, documents are kept as Python strings.')
+        string_dtype = None
+
+    categories = pd.unique(pd.concat([dataframe.label for dataframe in dataframes]))
+    try:
+        categories = sorted(categories)
+    except TypeError:
+        categories = list(categories)
+    if any(isinstance(category, tuple) for category in categories):
+        # Object index with tupleize_cols=False keeps Reuters topic tuples as single categories.
+        categories = pd.Index(categories, dtype=object, tupleize_cols=False)
+    else:
+        # Scalar labels keep their own dtype, e.g. integer IMDB ratings stay integers for sklearn.
+        categories = pd.Index(categories)
+    label_dtype = pd.CategoricalDtype(categories)
+
+    for dataframe in dataframes:
+        if string_dtype and 'document' in dataframe:
+            dataframe['document'] = dataframe['document'].astype(string_dtype)
+        dataframe['label'] = dataframe['label'].astype(label_dtype)
@@ -0,0 +1 @@
+from deduplication.deduplication import DeduplicationStats, NearDuplicateFilter, get_deduplication_filter
@@ -0,0 +1,245 @@
+import zlib
+import logging
+import collections
+import multiprocessing as mp
+import numpy as np
+
+
+DeduplicationStats = collections.namedtuple('DeduplicationStats', 
+    'documents removed_documents words removed_words removed_test_overlap')
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _shingle_hashes(doc, shingle_size):
+    """Returns 32-bit hashes of word shingles of a tokenized document."""
+    # crc32 is used instead of hash(), because it is the same in every worker process.
+    tokens = np.array([zlib.crc32(token.encode('utf8')) for token in doc], dtype=np.uint64)
+    if len(tokens) == 0:
+        return tokens
+    if len(tokens) < shingle_size:
+        shingle_size = len(tokens)
+
+    hashes = tokens[:len(tokens) - shingle_size + 1].copy()
+    for offset in range(1, shingle_size):
+        hashes = (hashes * np.uint64(1000003)) ^ tokens[offset:len(tokens) - shingle_size + 1 + offset]
+
+    return np.unique(hashes & _MAX_HASH)
+
+
+def _minhash_chunk(args):
+    """Returns MinHash signatures of a chunk of tokenized documents (module level, so that it can be pickled)."""
+    documents, shingle_size, a, b = args
+    signatures = np.full((len(documents), len(a)), _MAX_HASH, dtype=np.uint64)
+
+    for i, doc in enumerate(documents):
+        hashes = _shingle_hashes(doc, shingle_size)
+        if len(hashes):
+            # One universal hash permutation per row, minimum over all shingles.
+            permuted = (a[:, None] * hashes[None, :] + b[:, None]) % _MERSENNE_PRIME
+            signatures[i] = np.min(permuted & _MAX_HASH, axis=1)
+
+    return signatures
+
+
+class NearDuplicateFilter:
+    """A MinHash/LSH based filter removing near-duplicate documents from a training set.
+
+    Every document is represented by the set of its word shingles. MinHash signatures estimate Jaccard 
+    similarity of these sets and locality sensitive hashing (banding) finds candidate pairs without 
+    comparing all documents with each other. Candidates with estimated similarity of at least threshold 
+    are grouped and only the first document of every group is kept.
+
+    Only the training set is ever filtered, test documents are never removed, so evaluation is done on the 
+    same test set as without the filter. With drop_test_overlap, training documents that are near-duplicates 
+    of a test document are removed as well, so that the test set does not leak into training.
+
+    Attributes:
+        _threshold (float): minimal estimated Jaccard similarity of near-duplicates.
+        _shingle_size (int): number of words in a shingle.
+        _bands (int): number of LSH bands.
+        _rows (int): number of signature rows in a band.
+        _drop_test_overlap (bool): whether training near-duplicates of test documents are removed.
+        _workers (int): number of processes computing signatures.
+        stats (DeduplicationStats): statistics of the last filtering.
+
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, shingle_size=3, drop_test_overlap=True, seed=1, workers=None):
+        if not 0 < threshold <= 1:
+            raise ValueError('threshold must be in (0, 1], got {}.'.format(threshold))
+        self._threshold = threshold
+        self._shingle_size = shingle_size
+        self._bands, self._rows = self._lsh_params(threshold, num_perm)
+        self._drop_test_overlap = drop_test_overlap
+        self._workers = workers or mp.cpu_count()
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=self._bands * self._rows, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=self._bands * self._rows, dtype=np.uint64)
+        self.stats = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @staticmethod
+    def _lsh_params(threshold, num_perm):
+        """Returns (bands, rows) whose LSH similarity threshold (1/bands)^(1/rows) is closest to given one."""
+        params = [(num_perm // rows, rows) for rows in range(1, num_perm + 1)]
+
+        return min(params, key=lambda params: abs((1 / params[0]) ** (1 / params[1]) - threshold))
+
+    def signatures(self, prep_dataset):
+        """Returns MinHash signatures of given documents, computed in parallel chunks.
+
+        Args:
+            prep_dataset (pandas.Series(list(str))): documents after preprocessing. They must already be tokenized.
+        Returns:
+            signatures (numpy.ndarray): (documents x permutations) signature matrix.
+
+        """
+        documents = list(prep_dataset)
+        chunksize = max(1, -(-len(documents) // (4 * self._workers)))
+        chunks = [(documents[i:i + chunksize], self._shingle_size, self._a, self._b) 
+            for i in range(0, len(documents), chunksize)]
+
+        if self._workers == 1 or len(chunks) <= 1:
+            results = [_minhash_chunk(chunk) for chunk in chunks]
+        else:
+            with mp.Pool(processes=self._workers) as pool:
+                results = pool.map(_minhash_chunk, chunks)
+
+        if not results:
+            return np.empty((0, len(self._a)), dtype=np.uint64)
+
+        return np.vstack(results)
+
+    def _buckets(self, signatures, positions):
+        """Yields lists of document positions that share an LSH bucket in some band."""
+        for band in range(self._bands):
+            buckets = collections.defaultdict(list)
+            band_signatures = signatures[positions, band * self._rows:(band + 1) * self._rows]
+            for position, key in zip(positions, map(bytes, band_signatures)):
+                buckets[key].append(position)
+            for bucket in buckets.values():
+                if len(bucket) > 1:
+                    yield bucket
+
+    def _similar(self, signatures, first, second):
+        return np.mean(signatures[first] == signatures[second]) >= self._threshold
+
+    def duplicates(self, train_signatures, test_signatures=None):
+        """Returns mask of training documents to be removed.
+
+        Empty documents (whose signatures are all _MAX_HASH) have no shingles to compare, so they are never 
+        grouped with anything and are kept.
+
+        Args:
+            train_signatures (numpy.ndarray): signatures of training documents.
+            test_signatures (numpy.ndarray): signatures of test documents (only with drop_test_overlap).
+        Returns:
+            removed (numpy.ndarray(bool)): True for training documents that are near-duplicates of an earlier 
+                training document (or of a test document).
+            removed_test_overlap (int): how many of them were removed as near-duplicates of test documents.
+
+        """
+        num_train = len(train_signatures)
+        signatures = train_signatures
+        if test_signatures is not None and self._drop_test_overlap:
+            signatures = np.vstack((train_signatures, test_signatures))
+
+        # Union-find over verified pairs, the representative of a group is its first document.
+        parents = list(range(len(signatures)))
+
+        def find(position):
+            while parents[position] != position:
+                parents[position] = parents[parents[position]]
+                position = parents[position]
+            return position
+
+        positions = np.flatnonzero((signatures != _MAX_HASH).any(axis=1))
+        for bucket in self._buckets(signatures, positions):
+            # Every member is compared with earlier members until one of them verifies, so a dissimilar first 
+            # member does not hide near-duplicates among the others.
+            for i, position in enumerate(bucket[1:], 1):
+                for earlier in bucket[:i]:
+                    root, earlier_root = find(position), find(earlier)
+                    if root == earlier_root:
+                        break
+                    if self._similar(signatures, position, earlier):
+                        parents[max(root, earlier_root)] = min(root, earlier_root)
+                        break
+
+        roots = np.array([find(position) for position in range(len(signatures))], dtype=np.int64)
+
+        # Groups containing a test document drop all their training documents.
+        test_roots = set(roots[num_train:])
+        overlap = np.array([root in test_roots for root in roots[:num_train]], dtype=bool)
+        removed = (roots[:num_train] != np.arange(num_train)) | overlap
+
+        return removed, int(overlap.sum())
+
+    def deduplicate(self, train_set, prep_train, prep_test=None):
+        """Removes near-duplicate documents from a training set.
+
+        Args:
+            train_set (pandas.DataFrame): training set dataframe.
+            prep_train (pandas.Series(list(str))): preprocessed training documents (same index as train_set).
+            prep_test (pandas.Series(list(str))): preprocessed test documents, used with drop_test_overlap only.
+        Returns:
+            train_set (pandas.DataFrame): training set without near-duplicates.
+            prep_train (pandas.Series(list(str))): preprocessed training documents without near-duplicates.
+
+        """
+        train_signatures = self.signatures(prep_train)
+        test_signatures = None
+        if prep_test is not None and self._drop_test_overlap:
+            test_signatures = self.signatures(prep_test)
+
+        removed, removed_test_overlap = self.duplicates(train_signatures, test_signatures)
+        lengths = np.array([len(doc) for doc in prep_train], dtype=np.int64)
+
+        self.stats = DeduplicationStats(len(prep_train), int(removed.sum()), int(lengths.sum()), 
+            int(lengths[removed].sum()), removed_test_overlap)
+        self.logger.info('Removed %d of %d training documents (%d overlapping the test set), %d of %d words (%.1f%%).', 
+            self.stats.removed_documents, self.stats.documents, removed_test_overlap, self.stats.removed_words, 
+            self.stats.words, 100 * self.stats.removed_words / max(self.stats.words, 1))
+
+        return train_set[~removed], prep_train[~removed]
+
+    def saved_training_time(self, throughput):
+        """Returns training time saved by the filtering, estimated from measured doc2vec throughput.
+
+        Args:
+            throughput (doc2vec.callbacks.ThroughputLogger): history of doc2vec training on the filtered 
+                set, e.g. Doc2VecWrapper.throughput.
+        Returns:
+            seconds (float): estimated training time the removed words would have taken.
+
+        """
+        seconds = 0.0
+        for history in throughput.history.values():
+            for stats in history:
+                if stats.words_per_second > 0:
+                    seconds += self.stats.removed_words / stats.words_per_second
+        self.logger.info('Deduplication saved an estimated %.1f s of doc2vec training.', seconds)
+
+        return seconds
+
+
+def get_deduplication_filter(settings):
+    """Returns the near-duplicate filter described in settings, or None if deduplication is disabled.
+
+    settings['deduplication'] is optional, e.g. {"threshold": 0.8, "num_perm": 128, "drop_test_overlap": true}.
+
+    Args:
+        settings (dict): experiment description.
+    Returns:
+        dedup_filter (NearDuplicateFilter or None): the filter.
+
+    """
+    params = settings.get('deduplication')
+    if params is None or params is False:
+        return None
+    if params is True:
+        params = {}
+
+    return NearDuplicateFilter(**params)
@@ -0,0 +1,90 @@
+import logging
+import collections
+
+
+EpochStats = collections.namedtuple('EpochStats', 'epoch seconds words_per_second signal')
+
+
+class EpochCallback:
+    """A base class for callbacks called by Doc2VecWrapper after every training epoch."""
+
+    def on_train_begin(self, model_name):
+        """Called before the first epoch of each model.
+
+        Args:
+            model_name (str): name of the model being trained ('dbow' or 'dm').
+
+        """
+        pass
+
+    def on_epoch_end(self, model_name, stats):
+        """Called after every epoch.
+
+        Args:
+            model_name (str): name of the model being trained ('dbow' or 'dm').
+            stats (EpochStats): epoch number, wall time, throughput and validation signal (None if not computed).
+        Returns:
+            stop (bool): True if training of the model should be stopped.
+
+        """
+        return False
+
+
+class ThroughputLogger(EpochCallback):
+    """Logs and records wall time, throughput and validation signal of every epoch.
+
+    Attributes:
+        history (dict): map between model names and lists of their EpochStats.
+
+    """
+
+    def __init__(self):
+        self.history = {}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def on_train_begin(self, model_name):
+        self.history[model_name] = []
+
+    def on_epoch_end(self, model_name, stats):
+        self.history[model_name].append(stats)
+        signal = 'n/a' if stats.signal is None else '{:.4f}'.format(stats.signal)
+        self.logger.info('%s epoch %d: %.2f s, %.0f words/s, validation signal %s', model_name, stats.epoch, 
+            stats.seconds, stats.words_per_second, signal)
+
+        return False
+
+
+class EarlyStopping(EpochCallback):
+    """Stops training once the validation signal stops improving.
+
+    Attributes:
+        _patience (int): number of epochs without improvement after which training is stopped.
+        _min_delta (float): minimal increase of the signal that counts as an improvement.
+
+    """
+
+    def __init__(self, patience=2, min_delta=1e-3):
+        self._patience = patience
+        self._min_delta = min_delta
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def on_train_begin(self, model_name):
+        self._best = None
+        self._wait = 0
+
+    def on_epoch_end(self, model_name, stats):
+        if stats.signal is None:
+            return False
+
+        if self._best is None or stats.signal > self._best + self._min_delta:
+            self._best = stats.signal
+            self._wait = 0
+        else:
+            self._wait += 1
+
+        if self._wait >= self._patience:
+            self.logger.info('%s validation signal plateaued at %.4f, stopping after epoch %d.', model_name, 
+                self._best, stats.epoch)
+            return True
+
+        return False
@@ -1,8 +1,12 @@
+import time
 import multiprocessing as mp
 import numpy as np
 import pandas as pd
 from gensim.models import Doc2Vec
 from gensim.models.doc2vec import TaggedDocument
+from doc2vec.callbacks import EpochStats, ThroughputLogger, EarlyStopping
+from doc2vec.vocabulary import StreamingVocabulary
+from features.feature_store import FeatureStore
 
 
 class TaggedDocumentIterator:
@@ -11,64 +15,212 @@ class TaggedDocumentIterator:
     Attributes:
         _documents (list(list(str))): a list of tokenized documents.
         _labels (list): a list of document labels (commonly just subsequent integers).
+        _vocabulary (set(str)): if given, only these words are yielded.
         size (int): number of stored documents. 
+        words (int): number of stored words.
 
     """
 
-    def __init__(self, documents, labels):
+    def __init__(self, documents, labels, vocabulary=None):
         self._documents = documents
         self._labels = labels
+        self._vocabulary = vocabulary
         self.size = len(documents)
+        self.words = sum(len(doc) for doc in documents)
 
     def __iter__(self):
-        for doc, label in zip(self._documents, self._labels):
-            yield TaggedDocument(words=doc, tags=[label])
+        if self._vocabulary is not None:
+            vocabulary = self._vocabulary
+            for doc, label in zip(self._documents, self._labels):
+                yield TaggedDocument(words=[word for word in doc if word in vocabulary], tags=[label])
+        else:
+            for doc, label in zip(self._documents, self._labels):
+                yield TaggedDocument(words=doc, tags=[label])
 
 
 class Doc2VecWrapper:
-    """A class that allows to obtain vector representations for given documents."""
+    """A class that allows to obtain vector representations for given documents.
 
-    def train(self, prep_dataset, settings):
+    Vector length and training length are experiment settings passed to train, constructor arguments 
+    (e.g. "params" of settings['features'], see features.get_feature_engine) tune both gensim models.
+
+    Attributes:
+        _min_count (int): words occurring less often are ignored.
+        _negative (int): number of negative samples.
+        _window (int): context window of the DM model.
+        _dm_alpha (float): initial learning rate of the DM model (DBOW uses gensim's default).
+        _workers (int): number of training threads, mp.cpu_count() if None.
+
+    """
+
+    def __init__(self, min_count=2, negative=5, window=10, dm_alpha=0.05, workers=None):
+        self._min_count = min_count
+        self._negative = negative
+        self._window = window
+        self._dm_alpha = dm_alpha
+        self._workers = workers
+
+    @staticmethod
+    def _self_similarity(model, documents, tags):
+        """Returns mean cosine similarity between trained and re-inferred vectors of given training documents.
+
+        Args:
+            model (gensim.models.Doc2Vec): the model being trained.
+            documents (list(list(str))): tokenized training documents.
+            tags (list): tags of the documents.
+        Returns:
+            signal (float): the validation signal, the higher the better.
+
+        """
+        doc_vectors = model.dv if hasattr(model, 'dv') else model.docvecs
+        similarities = []
+
+        for doc, tag in zip(documents, tags):
+            trained = doc_vectors[tag]
+            inferred = model.infer_vector(doc)
+            norm = np.linalg.norm(trained) * np.linalg.norm(inferred)
+            similarities.append(np.dot(trained, inferred) / norm if norm > 0 else 0.0)
+
+        return float(np.mean(similarities))
+
+    def _train_model(self, model_name, model, doc_iterator, epochs, callbacks, validation):
+        """Trains a single model epoch by epoch, calling callbacks after every epoch.
+
+        The learning rate decays linearly from model.alpha to model.min_alpha over all epochs, as it would in 
+        a single train call. Training stops early if any of the callbacks asks for it.
+
+        Args:
+            model_name (str): name of the model passed to callbacks.
+            model (gensim.models.Doc2Vec): the model, with its vocabulary already built.
+            doc_iterator (TaggedDocumentIterator): training documents.
+            epochs (int): maximal number of epochs.
+            callbacks (list(doc2vec.callbacks.EpochCallback)): callbacks to be called after every epoch.
+            validation (tuple(list(list(str)), list)): documents and tags used to compute the validation signal, 
+                or None if no signal is needed.
+
+        """
+        for callback in callbacks:
+            callback.on_train_begin(model_name)
+
+        # Gensim's train() overwrites alpha, min_alpha and epochs with the values of every call. The configured ones 
+        # are kept here, rates of each epoch are computed from them and they are restored after every epoch, 
+        # because infer_vector (validation signal, features) uses them as well.
+        alpha, min_alpha, model_epochs = model.alpha, model.min_alpha, model.epochs
+        alpha_step = (alpha - min_alpha) / epochs
+        try:
+            for epoch in range(epochs):
+                start = time.perf_counter()
+                model.train(doc_iterator, total_examples=model.corpus_count, epochs=1, 
+                    start_alpha=alpha - epoch * alpha_step, end_alpha=alpha - (epoch + 1) * alpha_step)
+                seconds = time.perf_counter() - start
+                model.alpha, model.min_alpha, model.epochs = alpha, min_alpha, model_epochs
+
+                signal = self._self_similarity(model, *validation) if validation else None
+                stats = EpochStats(epoch + 1, seconds, doc_iterator.words / seconds if seconds > 0 else 0.0, signal)
+
+                # Every callback is called, even if an earlier one already asked to stop.
+                stop = [callback.on_epoch_end(model_name, stats) for callback in callbacks]
+                if any(stop):
+                    break
+        finally:
+            model.alpha, model.min_alpha, model.epochs = alpha, min_alpha, model_epochs
+
+    def train(self, prep_dataset, settings, callbacks=None):
         """Trains doc2vec model on given data.
 
+        Optional settings: 'epochs' (maximal number of epochs, 20 by default) and 'early_stopping', e.g. 
+        {"patience": 2, "min_delta": 0.001, "validation_size": 200}, which stops training of each model once 
+        self-similarity of re-inferred training documents (a sample of validation_size of them) plateaus.
+        'vocabulary', e.g. {"max_size": 100000, "max_memory_words": 2000000, "workers": 4}, builds the 
+        vocabulary in bounded memory with doc2vec.vocabulary.StreamingVocabulary, capped at max_size words, 
+        and shares it between both models.
+
         Args:
             prep_dataset (pandas.Series(list(str))): documents after preprocessing. They must already be tokenized.
             settings (dict): experiment description.
+            callbacks (list(doc2vec.callbacks.EpochCallback)): additional callbacks called after every epoch.
 
         """
         # Preliminaries.
         vector_length = settings['vector_length']        
+        epochs = settings.get('epochs', 20)
         labels = list(prep_dataset.index)
         doc_iterator = TaggedDocumentIterator(prep_dataset, labels)
+
+        self.throughput = ThroughputLogger()
+        callbacks = [self.throughput] + list(callbacks or [])
+        validation = None
+
+        early_stopping = settings.get('early_stopping')
+        if early_stopping:
+            early_stopping = dict(early_stopping)
+            validation_size = min(early_stopping.pop('validation_size', 200), len(labels))
+            sample = np.random.RandomState(0).choice(len(labels), validation_size, replace=False)
+            validation = ([prep_dataset.iloc[i] for i in sample], [labels[i] for i in sample])
+            callbacks.append(EarlyStopping(**early_stopping))
  
         # Define models.
-        cores = mp.cpu_count()
-        self._dbow_model = Doc2Vec(dm=0, vector_size=vector_length, negative=5, hs=0, min_count=2, sample=0, 
-            epochs=20, workers=cores)
-        self._dm_model = Doc2Vec(dm=1, vector_size=vector_length, window=10, negative=5, hs=0, min_count=2, 
-            sample=0, epochs=20, workers=cores, alpha=0.05)
+        cores = self._workers or mp.cpu_count()
+        self._dbow_model = Doc2Vec(dm=0, vector_size=vector_length, negative=self._negative, hs=0, 
+            min_count=self._min_count, sample=0, epochs=epochs, workers=cores)
+        self._dm_model = Doc2Vec(dm=1, vector_size=vector_length, window=self._window, negative=self._negative, hs=0, 
+            min_count=self._min_count, sample=0, epochs=epochs, workers=cores, alpha=self._dm_alpha)
     
         # Build the vocabulary.
-        self._dbow_model.build_vocab(doc_iterator)
-        self._dm_model.build_vocab(doc_iterator)
+        vocabulary_settings = settings.get('vocabulary')
+        if vocabulary_settings:
+            vocabulary_settings = dict(vocabulary_settings)
+            workers = vocabulary_settings.pop('workers', None)
+            vocabulary = StreamingVocabulary.build(prep_dataset, workers, min_count=self._min_count, 
+                **vocabulary_settings)
+
+            # Gensim counts only the selected words (so its raw counts are bounded by max_size), once for both models.
+            vocabulary = TaggedDocumentIterator(prep_dataset, labels, vocabulary.words())
+            self._dbow_model.build_vocab(vocabulary)
+            self._dm_model.reset_from(self._dbow_model)
+        else:
+            self._dbow_model.build_vocab(doc_iterator)
+            self._dm_model.build_vocab(doc_iterator)
 
         # Train models.
-        self._dbow_model.train(doc_iterator, total_examples=self._dbow_model.corpus_count, epochs=20)
-        self._dm_model.train(doc_iterator, total_examples=self._dm_model.corpus_count, epochs=20)
+        self._train_model('dbow', self._dbow_model, doc_iterator, epochs, callbacks, validation)
+        self._train_model('dm', self._dm_model, doc_iterator, epochs, callbacks, validation)
+
+        # Discard unnecessary parameters (gensim < 4 only, gensim 4 has no such temporary data).
+        for model in (self._dbow_model, self._dm_model):
+            if hasattr(model, 'delete_temporary_training_data'):
+                model.delete_temporary_training_data(keep_doctags_vectors=False)
 
-        # Discard unnecessary parameters.
-        self._dbow_model.delete_temporary_training_data(keep_doctags_vectors=False)
-        self._dm_model.delete_temporary_training_data(keep_doctags_vectors=False)
+    def _doc2vec_features_to_store(self, prep_dataset, store_path, shard_size):
+        """Writes doc2vec vector representations for given documents into a new FeatureStore, shard by shard."""
+        vector_length = self._dbow_model.vector_size + self._dm_model.vector_size
+        store = FeatureStore.create(store_path, len(prep_dataset), vector_length)
 
-    def doc2vec_features(self, prep_dataset):
+        for start in range(0, len(prep_dataset), shard_size):
+            shard = prep_dataset.iloc[start:start + shard_size]
+            rows = [np.concatenate((self._dbow_model.infer_vector(doc), self._dm_model.infer_vector(doc))) 
+                for doc in shard]
+            store.write(start, np.vstack(rows))
+        store.flush()
+
+        return store
+
+    def doc2vec_features(self, prep_dataset, store_path=None, shard_size=10000):
         """Returns doc2vec vector representations for given documents.
  
         Args:
             prep_dataset (pandas.Series(list(str))): documents after preprocessing. They must already be tokenized.
+            store_path (str): if given, representations are written shard by shard to a FeatureStore (.npy file) 
+                at this path instead of being kept in memory.
+            shard_size (int): number of documents inferred and written at a time (with store_path only).
         Returns:
-            representations (pandas.Series): NumPy arrays of vector representations for input documents.
+            representations (pandas.Series or features.FeatureStore): NumPy arrays of vector representations 
+                for input documents, or the FeatureStore holding them (with store_path).
 
         """
+        if store_path is not None:
+            return self._doc2vec_features_to_store(prep_dataset, store_path, shard_size)
+
         # Get vector representations from both models.
         # BTW inference parameters (alpha, number of epochs and so on) can be changed here.
         dbow_rep = prep_dataset.apply(self._dbow_model.infer_vector)
@@ -79,3 +231,6 @@ class Doc2VecWrapper:
 
         return representations
 
+    def features(self, prep_dataset, **kwargs):
+        """Returns doc2vec vector representations for given documents, see doc2vec_features."""
+        return self.doc2vec_features(prep_dataset, **kwargs)
@@ -0,0 +1,136 @@
+import logging
+import multiprocessing as mp
+from collections import Counter
+
+
+class StreamingVocabulary:
+    """A word counter working in bounded memory, for building doc2vec vocabulary of large corpora.
+
+    Whenever the number of counted words exceeds max_memory_words, all words counted less than 
+    a pruning threshold are discarded and the threshold is raised (the same scheme gensim uses 
+    for its max_vocab_size). Vocabularies of corpus shards can be built in parallel and merged.
+    Counts of words that survive pruning may be underestimated, so the result should be used to 
+    select the vocabulary, not as exact frequencies.
+
+    Attributes:
+        counts (collections.Counter): (approximate) word counts.
+        corpus_count (int): number of counted documents.
+        total_words (int): number of counted words (including pruned ones).
+        _min_count (int): words counted less are not included in the final vocabulary.
+        _max_size (int): maximal size of the final vocabulary (unlimited, if None).
+        _max_memory_words (int): maximal number of words counted at a time.
+        _min_reduce (int): current pruning threshold.
+        _shared_documents (list(list(str))): corpus being counted by build, inherited by forked workers.
+
+    """
+
+    _shared_documents = None
+
+    def __init__(self, min_count=2, max_size=None, max_memory_words=2000000):
+        self.counts = Counter()
+        self.corpus_count = 0
+        self.total_words = 0
+        self._min_count = min_count
+        self._max_size = max_size
+        self._max_memory_words = max_memory_words
+        self._min_reduce = 1
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def _prune(self):
+        """Discards rare words until the counts fit in memory bounds."""
+        while len(self.counts) > self._max_memory_words:
+            self.counts = Counter({word: count for word, count in self.counts.items() if count > self._min_reduce})
+            self._min_reduce += 1
+
+    def update(self, documents):
+        """Counts words of given documents.
+
+        Args:
+            documents (iterable(list(str))): tokenized documents.
+
+        """
+        for doc in documents:
+            self.counts.update(doc)
+            self.corpus_count += 1
+            self.total_words += len(doc)
+            if len(self.counts) > self._max_memory_words:
+                self._prune()
+
+    def merge(self, other):
+        """Adds counts of another vocabulary (e.g. built on another corpus shard).
+
+        Args:
+            other (StreamingVocabulary): the vocabulary to be merged into this one.
+
+        """
+        self.counts.update(other.counts)
+        self.corpus_count += other.corpus_count
+        self.total_words += other.total_words
+        self._min_reduce = max(self._min_reduce, other._min_reduce)
+        self._prune()
+
+    def words(self):
+        """Returns the final vocabulary: words counted at least min_count times, the max_size most frequent ones.
+
+        Returns:
+            words (set(str)): the vocabulary.
+
+        """
+        frequent = [(count, word) for word, count in self.counts.items() if count >= self._min_count]
+        if self._max_size is not None and len(frequent) > self._max_size:
+            # Ties are broken by the word itself, so that the result does not depend on sharding.
+            frequent.sort(key=lambda item: (-item[0], item[1]))
+            frequent = frequent[:self._max_size]
+
+        return set(word for _, word in frequent)
+
+    @classmethod
+    def _build_shard(cls, args):
+        """Counts documents [start, stop) of the corpus shared by build (inherited by forked workers)."""
+        start, stop, kwargs = args
+        documents = cls._shared_documents
+        documents = documents.iloc[start:stop] if hasattr(documents, 'iloc') else documents[start:stop]
+        vocabulary = cls(**kwargs)
+        vocabulary.update(documents)
+
+        return vocabulary
+
+    @classmethod
+    def build(cls, documents, workers=None, **kwargs):
+        """Builds vocabulary of given documents, counting shards of them in parallel processes.
+
+        Workers are forked and only receive index ranges of their shards, so the corpus is never pickled 
+        (i.e. copied) to them. Where fork is not available, the documents are counted in this process.
+
+        Args:
+            documents (list(list(str)) or pandas.Series(list(str))): tokenized documents.
+            workers (int): number of processes (and shards); mp.cpu_count() if None.
+            **kwargs: StreamingVocabulary constructor arguments.
+        Returns:
+            vocabulary (StreamingVocabulary): the merged vocabulary.
+
+        """
+        workers = min(workers or mp.cpu_count(), max(len(documents), 1))
+        if workers > 1 and 'fork' not in mp.get_all_start_methods():
+            logging.getLogger(cls.__name__).warning('fork is not available, counting words in a single process.')
+            workers = 1
+
+        shard_size = max(1, -(-len(documents) // workers))
+        shards = [(i, i + shard_size, kwargs) for i in range(0, len(documents), shard_size)] or [(0, 0, kwargs)]
+
+        cls._shared_documents = documents
+        try:
+            if workers == 1:
+                return cls._build_shard(shards[0])
+            with mp.get_context('fork').Pool(processes=workers) as pool:
+                vocabularies = pool.map(cls._build_shard, shards)
+        finally:
+            cls._shared_documents = None
+
+        vocabulary = vocabularies[0]
+        for other in vocabularies[1:]:
+            vocabulary.merge(other)
+        vocabulary.logger.info('Counted %d words of %d documents in %d shards, %d distinct words kept.', 
+            vocabulary.total_words, vocabulary.corpus_count, len(shards), len(vocabulary.counts))
+
+        return vocabulary
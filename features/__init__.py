@@ -0,0 +1,3 @@
+from features.bag_of_words import BagOfWordsWrapper
+from features.feature_store import FeatureStore
+from features.features import get_feature_engine
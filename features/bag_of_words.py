@@ -0,0 +1,78 @@
+import multiprocessing as mp
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+
+def _identity(tokens):
+    """Analyzer for already tokenized documents (module level, so that it can be pickled)."""
+    return tokens
+
+
+class BagOfWordsWrapper:
+    """A class that allows to obtain sparse bag-of-words representations for given documents.
+
+    It is a fast alternative to Doc2VecWrapper. Documents are hashed into a fixed number of features 
+    (the hashing trick), so no vocabulary has to be built or kept in memory, and chunks of documents 
+    are vectorized in parallel processes. With 'tfidf' kind, term frequencies are additionally 
+    reweighted by inverse document frequencies learned from the training set.
+
+    Attributes:
+        _kind (str): 'hashing' for (l2 normalized) term frequencies, 'tfidf' for TF-IDF weights.
+        _vectorizer (sklearn.feature_extraction.text.HashingVectorizer): the hashing vectorizer.
+        _tfidf (sklearn.feature_extraction.text.TfidfTransformer): IDF weights (for 'tfidf' kind only).
+        _min_parallel (int): smaller inputs are vectorized in the calling process.
+
+    """
+
+    def __init__(self, kind='tfidf', n_features=2 ** 20, sublinear_tf=True, min_parallel=2000):
+        if kind not in ('hashing', 'tfidf'):
+            raise ValueError('Unknown bag-of-words kind \'{}\', use \'hashing\' or \'tfidf\'.'.format(kind))
+        self._kind = kind
+        self._min_parallel = min_parallel
+        norm = 'l2' if kind == 'hashing' else None
+        self._vectorizer = HashingVectorizer(analyzer=_identity, n_features=n_features, alternate_sign=False, 
+            norm=norm)
+        self._tfidf = TfidfTransformer(sublinear_tf=sublinear_tf) if kind == 'tfidf' else None
+
+    def _hash(self, prep_dataset):
+        """Returns hashed term counts of given documents, vectorized in parallel chunks."""
+        documents = list(prep_dataset)
+        cores = mp.cpu_count()
+
+        if len(documents) < self._min_parallel or cores == 1:
+            return self._vectorizer.transform(documents)
+
+        chunksize = -(-len(documents) // cores)
+        chunks = [documents[i:i + chunksize] for i in range(0, len(documents), chunksize)]
+
+        with mp.Pool(processes=cores) as pool:
+            results = pool.map(self._vectorizer.transform, chunks)
+
+        return sp.vstack(results, format='csr')
+
+    def train(self, prep_dataset, settings=None):
+        """Learns IDF weights on given data (hashing features need no training).
+
+        Args:
+            prep_dataset (pandas.Series(list(str))): documents after preprocessing. They must already be tokenized.
+            settings (dict): experiment description (unused, kept for compatibility with Doc2VecWrapper).
+
+        """
+        if self._tfidf is not None:
+            self._tfidf.fit(self._hash(prep_dataset))
+
+    def features(self, prep_dataset):
+        """Returns bag-of-words representations for given documents.
+ 
+        Args:
+            prep_dataset (pandas.Series(list(str))): documents after preprocessing. They must already be tokenized.
+        Returns:
+            representations (scipy.sparse.csr_matrix): (documents x n_features) matrix of representations.
+
+        """
+        representations = self._hash(prep_dataset)
+
+        if self._tfidf is not None:
+            representations = self._tfidf.transform(representations)
+
+        return representations
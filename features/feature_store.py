@@ -0,0 +1,95 @@
+import os
+import numpy as np
+
+
+class FeatureStore:
+    """An on-disk, memory-mapped (documents x features) matrix for feature sets that do not fit in memory.
+
+    The matrix is a raw .npy file, written shard by shard (e.g. by Doc2VecWrapper.doc2vec_features) and read 
+    back in chunks (e.g. by Trainer), so only one shard or chunk has to be held in memory at a time.
+
+    Attributes:
+        path (str): path to the .npy file.
+        _matrix (numpy.memmap): the memory-mapped matrix.
+
+    """
+
+    def __init__(self, path, matrix):
+        self.path = path
+        self._matrix = matrix
+
+    @classmethod
+    def create(cls, path, num_rows, num_columns, dtype=np.float32):
+        """Creates a new (zero-filled) feature store.
+
+        Args:
+            path (str): path to the .npy file to be created.
+            num_rows (int): number of documents.
+            num_columns (int): number of features.
+            dtype (numpy.dtype): type of the features.
+        Returns:
+            store (FeatureStore): the created store.
+
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        matrix = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(num_rows, num_columns))
+
+        return cls(path, matrix)
+
+    @classmethod
+    def open(cls, path, mode='r'):
+        """Opens an existing feature store.
+
+        Args:
+            path (str): path to the .npy file.
+            mode (str): 'r' for read-only access, 'r+' to allow writes.
+        Returns:
+            store (FeatureStore): the opened store.
+
+        """
+        return cls(path, np.load(path, mmap_mode=mode))
+
+    @property
+    def shape(self):
+        return self._matrix.shape
+
+    def __len__(self):
+        return self._matrix.shape[0]
+
+    def write(self, start, rows):
+        """Writes a shard of feature rows, starting at given row.
+
+        Args:
+            start (int): index of the first row to be written.
+            rows (numpy.ndarray): (shard size x features) array.
+
+        """
+        self._matrix[start:start + len(rows)] = rows
+
+    def flush(self):
+        """Writes pending changes to disk."""
+        self._matrix.flush()
+
+    def chunks(self, chunk_size, random_state=None):
+        """Yields the matrix in consecutive chunks of rows, read into memory.
+
+        Args:
+            chunk_size (int): number of rows in a chunk.
+            random_state (numpy.random.RandomState): if given, chunks are yielded in random order (each one 
+                is still a consecutive range of rows, read sequentially).
+        Yields:
+            start (int): index of the first row of the chunk.
+            chunk (numpy.ndarray): (chunk size x features) array.
+
+        """
+        starts = list(range(0, len(self), chunk_size))
+        if random_state is not None:
+            random_state.shuffle(starts)
+        for start in starts:
+            yield start, np.array(self._matrix[start:start + chunk_size])
+
+    def load(self):
+        """Returns the whole matrix read into memory."""
+        return np.array(self._matrix)
@@ -0,0 +1,31 @@
+from features.bag_of_words import BagOfWordsWrapper
+
+
+def get_feature_engine(settings):
+    """Returns the feature engine described in settings.
+
+    settings['features'] is optional and defaults to doc2vec, e.g. {"type": "tfidf", "params": {"n_features": 
+    1048576}} selects TF-IDF bag-of-words features. "params" are constructor arguments of the engine 
+    (BagOfWordsWrapper or Doc2VecWrapper, e.g. {"type": "doc2vec", "params": {"window": 5}}). Every engine 
+    provides train(prep_dataset, settings) and features(prep_dataset) methods, and its features can be passed 
+    to Trainer directly.
+
+    Args:
+        settings (dict): experiment description.
+    Returns:
+        engine (Doc2VecWrapper or BagOfWordsWrapper): the feature engine.
+
+    """
+    features_settings = settings.get('features', {'type': 'doc2vec'})
+    engine_type = features_settings['type']
+    params = features_settings.get('params', {})
+
+    if engine_type == 'doc2vec':
+        # Imported here, because doc2vec itself uses features.FeatureStore.
+        from doc2vec import Doc2VecWrapper
+        return Doc2VecWrapper(**params)
+    elif engine_type in ('hashing', 'tfidf'):
+        return BagOfWordsWrapper(kind=engine_type, **params)
+    else:
+        raise NameError('Feature engine \'{}\' could not be found. Available engines:\n'.format(engine_type) + 
+            '\n'.join(['\'doc2vec\'', '\'hashing\'', '\'tfidf\'']))
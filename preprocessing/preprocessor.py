@@ -4,11 +4,13 @@ from preprocessing.tokenizers import Tokenizer
 from preprocessing.stop_words import StopWords
 import pandas as pd
 import logging
+import sys
 from functools import reduce
-from collections import OrderedDict, Iterable
+from collections import OrderedDict
+from collections.abc import Iterable
 
 def get_all_implementations(name,cls):
-	subclasses = {scls.__name__ :cls for scls in cls.__subclasses__()}
+	subclasses = {scls.__name__ :scls for scls in cls.__subclasses__()}
 	subclasses[name] = cls
 	return subclasses
 	
@@ -36,18 +38,49 @@ class Preprocessor:
 					self._processors.append(dic[processor]())
 					
 		self.to_lower = "lowercase" in settings and settings["lowercase"]
+		#Memory-lean mode shares a single string object per distinct token and drops raw documents once tokenized
+		self.memory_lean = "memory_lean" in settings and settings["memory_lean"]
+		self.drop_raw_text = settings.get("drop_raw_text", self.memory_lean)
+		self.batch_size = settings.get("preprocess_batch_size", 10000)
 		
 	def _preprocess(self, text):
 		if self.to_lower:
 			text = text.lower()
 
 		preprocessed = reduce(lambda v, preprocessor: preprocessor.process(v), self._processors, text)
+		if self.memory_lean and isinstance(preprocessed, list):
+			preprocessed = list(map(sys.intern, preprocessed))
 
 		#if isinstance(preprocessed, Iterable) and not isinstance(preprocessed, str):
 		#	preprocessed=" ".join(preprocessed)
 
 		return preprocessed
 		
+	def _preprocess_tokens(self, words):
+		words = reduce(lambda v, preprocessor: preprocessor.process(v), self._processors[1:], words)
+		if self.memory_lean:
+			words = list(map(sys.intern, words))
+		return words
+		
 	def preprocess(self, df):
-		return df.document.apply(self._preprocess)
+		documents = df.document
+		if self._processors and hasattr(self._processors[0], 'process_batch'):
+			#Tokenize in batches, lowercasing is fused into the tokenizer pass
+			#Only one batch of raw documents is materialized as Python strings at a time
+			tokens = []
+			for start in range(0, len(documents), self.batch_size):
+				batch = documents.iloc[start:start + self.batch_size].tolist()
+				batch = self._processors[0].process_batch(batch, lowercase=self.to_lower)
+				tokens.extend(self._preprocess_tokens(words) for words in batch)
+			tokens = pd.Series(tokens, index=df.index, name=documents.name, dtype=object)
+		else:
+			tokens = documents.apply(self._preprocess)
+		return tokens
+		
+	def without_raw_text(self, df):
+		#Returns df without raw documents if drop_raw_text is set, df itself is left untouched
+		#Rebind the caller's reference (train_set = preprocessor.without_raw_text(train_set)) to free the documents
+		if self.drop_raw_text and 'document' in df:
+			return df.drop(columns='document')
+		return df
 		
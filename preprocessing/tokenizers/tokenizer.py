@@ -1,9 +1,71 @@
+import re
 from nltk.tokenize import wordpunct_tokenize, word_tokenize
 
 class Tokenizer():
 	def process(self,text):
 		return  wordpunct_tokenize(text)
+
+	def process_batch(self,texts,lowercase=False):
+		if lowercase:
+			return [self.process(text.lower()) for text in texts]
+		return [self.process(text) for text in texts]
 		
 class WordTokenizer(Tokenizer):
 	def process(self,text):
-		return word_tokenize(text)
\ No newline at end of file
+		return word_tokenize(text)
+
+class RegexTokenizer(Tokenizer):
+	"""A fast approximation of WordTokenizer built on a single precompiled pattern.
+
+	It follows Treebank conventions: clitics and negations are split off (I 'd, do n't), as are cannot, gonna, 
+	gotta, wanna, gimme and lemme (can not, gon na, ...), double quotes are turned into `` and '', inner 
+	apostrophes (O'Neil) and dotted abbreviations (U.S.A., e.g., Ph.D.) stay whole. Punkt sentence splitting 
+	is not done, which leads to the known differences checked in tests/test_tokenizer.py: an abbreviation 
+	ending a sentence keeps its period (U.S. instead of U.S .) and only acronyms and a handful of common 
+	titles (Mr., Dr., ...) are recognized as abbreviations, so e.g. Sgt. is split into Sgt and a period.
+	Slashes and periods inside tokens are split off (10/10 becomes 10 / 10, b.com becomes b . com), unlike 
+	Treebank, which keeps such tokens whole, and 'n' is split into ' n ' instead of 'n '.
+	"""
+	_OPENING_QUOTES = re.compile(r'(?:^|(?<=[\s(\[{<]))"')
+	_TOKENS = re.compile(r"""
+		(?:[A-Za-z]{1,2}\.){2,}                                   # acronyms: U.S., e.g., Ph.D.
+		|(?:[Mm]rs?|[Mm]s|[Dd]r|[Pp]rof|[SsJj]r|[Ss]t|vs)\.(?=\s) # common abbreviations
+		|\d+(?:[.,:]\d+)+                                         # numbers: 3.14, 1,000, 10:30
+		|n't\b|N'T\b                                              # negations, see _split_negations
+		|'(?:[sSdDmM]|re|RE|ve|VE|ll|LL)\b                        # clitics: 's, 're, ...
+		|(?=[cCgGlLwW])(?i:can(?=not\b)|gim(?=me\b)|gon(?=na\b)|got(?=ta\b)|lem(?=me\b)|wan(?=na\b))  # cannot, gonna, ...
+		|\w+(?:-\w+)*(?:'(?![sSdDmM]\b|re\b|RE\b|ve\b|VE\b|ll\b|LL\b)\w+(?:-\w+)*)*  # words: hyphenated, O'Neil
+		|``|''|\.\.\.|--
+		|[^\w\s]
+		""", re.VERBOSE)
+
+	@staticmethod
+	def _split_negations(text):
+		#Plain string replacement is much cheaper than a lazy pattern stopping words before n't
+		if "n't" in text:
+			text = text.replace("n't", " n't")
+		if "N'T" in text:
+			text = text.replace("N'T", " N'T")
+		return text
+
+	def process(self,text):
+		text = self._split_negations(text)
+		if '"' in text:
+			text = self._OPENING_QUOTES.sub('``', text).replace('"', "''")
+		return self._TOKENS.findall(text)
+
+	def process_batch(self,texts,lowercase=False):
+		#Bound methods are looked up once for the whole batch, lowercasing is fused into the same pass.
+		findall = self._TOKENS.findall
+		opening = self._OPENING_QUOTES.sub
+		split_negations = self._split_negations
+		tokenized = []
+		append = tokenized.append
+		for text in texts:
+			if lowercase:
+				text = text.lower()
+			text = split_negations(text)
+			if '"' in text:
+				text = opening('``', text).replace('"', "''")
+			append(findall(text))
+		return tokenized
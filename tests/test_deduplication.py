@@ -0,0 +1,84 @@
+import random
+import numpy as np
+import pandas as pd
+import pytest
+from deduplication import NearDuplicateFilter, get_deduplication_filter
+
+def _document(rng, length=100):
+	return ['w{}'.format(rng.randrange(5000)) for _ in range(length)]
+
+def _edited(document, rng, edits):
+	document = list(document)
+	for position in rng.sample(range(len(document)), edits):
+		document[position] = 'edit{}'.format(rng.randrange(10 ** 6))
+	return document
+
+def _deduplicate(train, test=None, **kwargs):
+	dedup_filter = NearDuplicateFilter(workers=1, **kwargs)
+	prep_train = pd.Series(train)
+	train_set = pd.DataFrame({'label': range(len(train))})
+	train_set, prep_train = dedup_filter.deduplicate(train_set, prep_train, None if test is None else pd.Series(test))
+	assert list(train_set.index) == list(prep_train.index)
+	return list(train_set.label), dedup_filter.stats
+
+def test_removes_near_duplicates_keeping_the_first():
+	rng = random.Random(0)
+	originals = [_document(rng) for _ in range(20)]
+	train = originals + [_edited(document, rng, 1) for document in originals[:5]]
+	kept, stats = _deduplicate(train)
+	assert kept == list(range(20))
+	assert stats.removed_documents == 5 and stats.removed_words == 500 and stats.words == 2500
+
+@pytest.mark.parametrize('threshold,removed', [(0.9, False), (0.5, True)])
+def test_threshold(threshold, removed):
+	#Ten of a hundred words changed: shingle Jaccard similarity is roughly 0.6
+	rng = random.Random(1)
+	document = _document(rng)
+	kept, _ = _deduplicate([document, _edited(document, rng, 10)], threshold=threshold)
+	assert kept == ([0] if removed else [0, 1])
+
+def test_distinct_documents_are_kept():
+	rng = random.Random(2)
+	kept, stats = _deduplicate([_document(rng) for _ in range(50)])
+	assert kept == list(range(50)) and stats.removed_documents == 0
+
+def test_test_overlap_removes_training_documents_only():
+	rng = random.Random(3)
+	train = [_document(rng) for _ in range(10)]
+	test = [_edited(train[4], rng, 1), _document(rng)]
+	kept, stats = _deduplicate(train, test)
+	assert kept == [0, 1, 2, 3, 5, 6, 7, 8, 9]
+	assert stats.removed_test_overlap == 1
+	kept, stats = _deduplicate(train, test, drop_test_overlap=False)
+	assert kept == list(range(10)) and stats.removed_test_overlap == 0
+
+def test_empty_documents_are_never_grouped():
+	kept, stats = _deduplicate([[], [], ['a', 'b', 'c', 'd']], [[]])
+	assert kept == [0, 1, 2]
+	assert stats.removed_documents == 0 and stats.removed_test_overlap == 0
+
+def test_dissimilar_first_bucket_member_does_not_hide_duplicates():
+	#All three signatures share only their first band's bucket, the last two are near-duplicates that differ 
+	#in one row of every other band, so that bucket is the only one where they meet
+	dedup_filter = NearDuplicateFilter(threshold=0.8, num_perm=16, workers=1)
+	signatures = np.arange(3 * len(dedup_filter._a), dtype=np.uint64).reshape(3, -1)
+	signatures[:, :dedup_filter._rows] = 7
+	signatures[2] = signatures[1]
+	signatures[2, dedup_filter._rows::dedup_filter._rows] += 1000
+	removed, _ = dedup_filter.duplicates(signatures)
+	assert list(removed) == [False, False, True]
+
+def test_parallel_signatures_match_serial():
+	rng = random.Random(4)
+	documents = pd.Series([_document(rng, rng.randrange(0, 30)) for _ in range(200)])
+	serial = NearDuplicateFilter(workers=1).signatures(documents)
+	parallel = NearDuplicateFilter(workers=3).signatures(documents)
+	np.testing.assert_array_equal(serial, parallel)
+
+def test_settings():
+	assert get_deduplication_filter({}) is None
+	assert get_deduplication_filter({'deduplication': False}) is None
+	assert isinstance(get_deduplication_filter({'deduplication': True}), NearDuplicateFilter)
+	assert get_deduplication_filter({'deduplication': {'threshold': 0.5}})._threshold == 0.5
+	with pytest.raises(ValueError):
+		NearDuplicateFilter(threshold=0)
@@ -0,0 +1,62 @@
+import pytest
+from data_loader.dataset.dataset import Dataset
+from data_loader.ingestion import IngestionEngine
+import data_loader.ingestion as ingestion
+
+class FolderDataset(Dataset):
+	"""Every file is a document labelled by its name's suffix (index_label.txt)."""
+
+	def _get_file_paths(self, limit=None, sample_fraction=None, seed=None):
+		paths = sorted(str(path) for path in self._data_path.iterdir())
+		return self._sample_file_paths(paths, limit, sample_fraction, seed), []
+
+	@staticmethod
+	def _get_label(path):
+		return path.rsplit('_', 1)[-1][:-len('.txt')]
+
+	@staticmethod
+	def _parse_single_file(path, content):
+		return content, FolderDataset._get_label(path)
+
+	def get_dataset(self, limit=None, sample_fraction=None, seed=None):
+		return super().get_dataset(limit, sample_fraction, seed)
+
+def _write_files(directory, count):
+	for i in range(count):
+		(directory / '{:03d}_{}.txt'.format(i, 'pos' if i % 2 else 'neg')).write_text('document {}\r\n'.format(i))
+
+@pytest.mark.parametrize('cpus', [1, 8, 64])
+def test_fewer_files_than_cpus(tmp_path, monkeypatch, cpus):
+	#Regression: the former mp.Pool based loader used len(files) // cpu_count() == 0 as chunksize
+	monkeypatch.setattr(ingestion.mp, 'cpu_count', lambda: cpus)
+	_write_files(tmp_path, 3)
+	train_set, test_set = FolderDataset(tmp_path).get_dataset()
+	assert list(train_set.document) == ['document 0\n', 'document 1\n', 'document 2\n']
+	assert list(train_set.label) == ['neg', 'pos', 'neg']
+	assert len(test_set) == 0
+
+def test_keeps_file_order_across_batches(tmp_path):
+	_write_files(tmp_path, 200)
+	paths = sorted(str(path) for path in tmp_path.iterdir())
+	with IngestionEngine(FolderDataset._parse_single_file, batch_size=7) as engine:
+		documents, labels = engine.load(paths)
+		assert documents == ['document {}\n'.format(i) for i in range(200)]
+		#The engine is reusable for another split
+		assert engine.load(paths[:5])[0] == documents[:5]
+
+def test_empty_input():
+	with IngestionEngine(FolderDataset._parse_single_file) as engine:
+		assert engine.load([]) == ([], [])
+
+def test_read_batch_bounds_open_files(tmp_path, monkeypatch):
+	_write_files(tmp_path, 10)
+	paths = sorted(str(path) for path in tmp_path.iterdir())
+	opened = []
+	original_open = open
+	def counting_open(path, mode='r', *args, **kwargs):
+		handle = original_open(path, mode, *args, **kwargs)
+		opened.append(handle)
+		assert sum(not f.closed for f in opened) <= 3
+		return handle
+	monkeypatch.setattr('builtins.open', counting_open)
+	assert len(ingestion._read_batch(paths, max_open=3)) == 10
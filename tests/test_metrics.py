@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sklearn.metrics
+from trainer.Metrics import MetricEvaluator, Estimate
+from trainer.Trainer import Predicted
+from data_loader.util import label_indicator
+
+SCORES = ["precision_score", "recall_score", "f1_score", "jaccard_score"]
+AVERAGES = ["micro", "macro", "weighted", None]
+
+rng = np.random.RandomState(0)
+MULTICLASS_TRUE = rng.randint(0, 5, 300)
+MULTICLASS_PRED = np.where(rng.rand(300) < 0.6, MULTICLASS_TRUE, rng.randint(0, 6, 300))
+BINARY_TRUE = rng.randint(0, 2, 300) * 2
+BINARY_PRED = np.where(rng.rand(300) < 0.7, BINARY_TRUE, 2 - BINARY_TRUE)
+MULTILABEL_TRUE = [tuple(np.flatnonzero(row)) for row in rng.rand(300, 6) < 0.3]
+MULTILABEL_PRED = [tuple(np.flatnonzero(row)) for row in rng.rand(300, 6) < 0.3]
+
+def _evaluate(metric, y_true, predicted, classes=None, **settings):
+	evaluator = MetricEvaluator(dict(metric=metric, **settings))
+	test_set = pd.DataFrame({"label": y_true})
+	[(_, value)] = evaluator.evaluate(test_set, [Predicted("model", predicted, classes)])
+	return value
+
+def _multilabel_matrices():
+	test_set = pd.DataFrame({"label": MULTILABEL_TRUE})
+	y_true, classes = label_indicator(test_set)
+	y_pred, _ = label_indicator(pd.DataFrame({"label": MULTILABEL_PRED}), classes)
+	return y_true, y_pred, classes
+
+@pytest.mark.parametrize("name", SCORES)
+@pytest.mark.parametrize("average", AVERAGES)
+def test_multiclass_matches_sklearn(name, average):
+	params = {"average": average}
+	expected = getattr(sklearn.metrics, name)(MULTICLASS_TRUE, MULTICLASS_PRED, zero_division=0, **params)
+	value = _evaluate({"name": name, "params": params}, MULTICLASS_TRUE, MULTICLASS_PRED)
+	np.testing.assert_allclose(value, expected)
+
+def test_accuracy_matches_sklearn():
+	expected = sklearn.metrics.accuracy_score(MULTICLASS_TRUE, MULTICLASS_PRED)
+	assert _evaluate({"name": "accuracy_score"}, MULTICLASS_TRUE, MULTICLASS_PRED) == pytest.approx(expected)
+
+@pytest.mark.parametrize("name", SCORES)
+@pytest.mark.parametrize("pos_label", [0, 2])
+def test_binary_pos_label_matches_sklearn(name, pos_label):
+	params = {"pos_label": pos_label}
+	expected = getattr(sklearn.metrics, name)(BINARY_TRUE, BINARY_PRED, **params)
+	assert _evaluate({"name": name, "params": params}, BINARY_TRUE, BINARY_PRED) == pytest.approx(expected)
+
+def test_fbeta_matches_sklearn():
+	params = {"beta": 0.5, "average": "macro"}
+	expected = sklearn.metrics.fbeta_score(MULTICLASS_TRUE, MULTICLASS_PRED, **params)
+	assert _evaluate({"name": "fbeta_score", "params": params}, MULTICLASS_TRUE, MULTICLASS_PRED) == pytest.approx(expected)
+
+@pytest.mark.parametrize("params", [{}, {"pos_label": 1}])
+def test_binary_average_raises_like_sklearn(params):
+	#Multiclass target, or a pos_label that is not a class: sklearn's own error, not a wrong class's score
+	with pytest.raises(ValueError):
+		_evaluate({"name": "f1_score", "params": params}, MULTICLASS_TRUE, MULTICLASS_PRED)
+	with pytest.raises(ValueError):
+		_evaluate({"name": "f1_score", "params": {"pos_label": 1}}, BINARY_TRUE, BINARY_PRED)
+
+@pytest.mark.parametrize("name", SCORES)
+@pytest.mark.parametrize("average", ["micro", "macro", "weighted", "samples", None])
+def test_multilabel_matches_sklearn(name, average):
+	y_true, y_pred, classes = _multilabel_matrices()
+	params = {"average": average}
+	expected = getattr(sklearn.metrics, name)(y_true, y_pred, zero_division=0, **params)
+	value = _evaluate({"name": name, "params": params}, MULTILABEL_TRUE, y_pred, classes)
+	np.testing.assert_allclose(value, expected)
+
+def test_multilabel_accuracy_is_exact_match():
+	y_true, y_pred, classes = _multilabel_matrices()
+	expected = sklearn.metrics.accuracy_score(y_true, y_pred)
+	assert _evaluate({"name": "accuracy_score"}, MULTILABEL_TRUE, y_pred, classes) == pytest.approx(expected)
+
+def test_bootstrap_reproducible_with_random_state():
+	metric = [{"name": "f1_score", "params": {"average": "macro"}}, {"name": "accuracy_score"}]
+	bootstrap = {"samples": 200, "confidence": 0.9, "random_state": 42}
+	first = _evaluate(metric, MULTICLASS_TRUE, MULTICLASS_PRED, bootstrap=bootstrap)
+	second = _evaluate(metric, MULTICLASS_TRUE, MULTICLASS_PRED, bootstrap=bootstrap)
+	assert first == second
+	for estimate in first.values():
+		assert isinstance(estimate, Estimate)
+		assert estimate.low <= estimate.value <= estimate.high
+	other = _evaluate(metric, MULTICLASS_TRUE, MULTICLASS_PRED, bootstrap=dict(bootstrap, random_state=7))
+	assert other["f1_score"].low != first["f1_score"].low
@@ -0,0 +1,70 @@
+from collections import Counter
+import pytest
+from data_loader.util import stratified_sample
+from data_loader.dataset.reuters_dataset import ReutersDataset
+
+ITEMS = list(range(100))
+LABELS = ['a'] * 70 + ['b'] * 20 + ['c'] * 10
+
+def test_keeps_label_proportions():
+	sample = stratified_sample(ITEMS, LABELS, limit=50, seed=0)
+	assert Counter(LABELS[i] for i in sample) == {'a': 35, 'b': 10, 'c': 5}
+
+def test_largest_remainder_fills_limit():
+	sample = stratified_sample(ITEMS, LABELS, limit=7, seed=0)
+	assert len(sample) == 7
+	assert Counter(LABELS[i] for i in sample) == {'a': 5, 'b': 1, 'c': 1}
+
+def test_original_order_and_reproducible():
+	sample = stratified_sample(ITEMS, LABELS, sample_fraction=0.3, seed=1)
+	assert sample == sorted(sample)
+	assert len(sample) == 30
+	assert sample == stratified_sample(ITEMS, LABELS, sample_fraction=0.3, seed=1)
+	assert sample != stratified_sample(ITEMS, LABELS, sample_fraction=0.3, seed=2)
+
+def test_limit_and_fraction_combined():
+	assert len(stratified_sample(ITEMS, LABELS, limit=10, sample_fraction=0.5, seed=0)) == 10
+	assert len(stratified_sample(ITEMS, LABELS, limit=80, sample_fraction=0.5, seed=0)) == 50
+
+def test_small_positive_fraction_keeps_one_item():
+	assert len(stratified_sample(list(range(10)), ['x'] * 10, sample_fraction=0.05, seed=0)) == 1
+	assert stratified_sample([], [], sample_fraction=0.05) == []
+
+def test_no_sampling_keeps_everything():
+	assert stratified_sample(ITEMS, LABELS) == ITEMS
+	assert stratified_sample(ITEMS, LABELS, limit=1000) == ITEMS
+	assert stratified_sample(ITEMS, LABELS, limit=0) == []
+
+@pytest.mark.parametrize('kwargs', [{'limit': -1}, {'sample_fraction': 0}, {'sample_fraction': 1.5}])
+def test_invalid_arguments(kwargs):
+	with pytest.raises(ValueError):
+		stratified_sample(ITEMS, LABELS, **kwargs)
+
+def _reuters_block(topics, body):
+	topics = ''.join('<D>{}</D>'.format(topic) for topic in topics)
+	return '<REUTERS><TOPICS>{}</TOPICS><TEXT><BODY>{}</BODY></TEXT></REUTERS>\n'.format(topics, body)
+
+@pytest.fixture
+def reuters_dir(tmp_path):
+	blocks = []
+	for i in range(40):
+		if i < 20 and i % 4 == 3:
+			blocks.append(_reuters_block(['acq'], ''))  # no document, dropped by BlockConsumer
+		elif i % 11 == 5:
+			blocks.append(_reuters_block([], 'unlabelled {}'.format(i)))
+		else:
+			blocks.append(_reuters_block(['earn'] if i % 2 else ['acq', 'earn'], 'document {}'.format(i)))
+	(tmp_path / 'reut2-000.sgm').write_text(''.join(blocks))
+	return tmp_path
+
+def test_reuters_sampled_split_matches_full_split(reuters_dir):
+	dataset = ReutersDataset(str(reuters_dir))
+	train_set, test_set = dataset.get_dataset()
+	#sample_fraction=1 goes through the block level sampling path, but must select the same documents
+	sampled_train, sampled_test = dataset.get_dataset(sample_fraction=1.0)
+	assert list(sampled_train.document) == list(train_set.document)
+	assert list(sampled_test.document) == list(test_set.document)
+
+def test_reuters_sample_respects_limit(reuters_dir):
+	train_set, test_set = ReutersDataset(str(reuters_dir)).get_dataset(limit=5, seed=0)
+	assert len(train_set) == 5 and len(test_set) == 5
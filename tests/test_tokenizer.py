@@ -0,0 +1,70 @@
+import pytest
+from nltk.tokenize import word_tokenize, wordpunct_tokenize
+from preprocessing.preprocessor import get_all_implementations
+from preprocessing.tokenizers import Tokenizer, RegexTokenizer
+
+#Single sentences, so NLTK's Treebank stage can be compared without Punkt sentence splitting (preserve_line)
+TREEBANK_SENTENCES = [
+	"This movie was great, I loved it!",
+	"I don't know why they can't, won't or shouldn't.",
+	"She's here; we're there and they'll come, I'm sure you've seen I'd go.",
+	"He said \"hello\" and left (quickly) [really] {maybe} <sometimes>",
+	"Mr. Smith and Dr. Jones met Mrs. Brown vs. Prof. White in St. Louis",
+	"The U.S.A. and the U.K. e.g. London i.e. the capital",
+	"O'Neil got a Ph.D. from rock'n'roll school",
+	"I cannot believe it, gonna wanna gotta gimme lemme",
+	"It costs $5.50 or 1,000 dollars at 10:30 - 3.14% off",
+	"Well... it's--you know--state-of-the-art & well-known",
+	"Numbers like 42 and words_with_underscores stay whole",
+	"WE DON'T SHOUT, WE'RE CALM AND THEY'LL SEE",
+]
+
+#Known differences from word_tokenize, documented in RegexTokenizer's docstring
+DIFFERENCES = [
+	("I live in the U.S.", ["I", "live", "in", "the", "U.S."], ["I", "live", "in", "the", "U.S", "."]),
+	("Call Sgt. Pepper", ["Call", "Sgt", ".", "Pepper"], ["Call", "Sgt.", "Pepper"]),
+	("I rate it 10/10", ["I", "rate", "it", "10", "/", "10"], ["I", "rate", "it", "10/10"]),
+	("Visit b.com today", ["Visit", "b", ".", "com", "today"], ["Visit", "b.com", "today"]),
+	("rock 'n' roll", ["rock", "'", "n", "'", "roll"], ["rock", "'n", "'", "roll"]),
+]
+
+@pytest.fixture
+def tokenizer():
+	return RegexTokenizer()
+
+def test_registered_as_tokenizer():
+	assert get_all_implementations("tokenizer", Tokenizer)["RegexTokenizer"] is RegexTokenizer
+
+@pytest.mark.parametrize("text", TREEBANK_SENTENCES)
+def test_matches_treebank(tokenizer, text):
+	assert tokenizer.process(text) == word_tokenize(text, preserve_line=True)
+
+@pytest.mark.parametrize("text", TREEBANK_SENTENCES)
+def test_matches_treebank_lowercase(tokenizer, text):
+	assert tokenizer.process(text.lower()) == word_tokenize(text.lower(), preserve_line=True)
+
+@pytest.mark.parametrize("text,regex,treebank", DIFFERENCES)
+def test_documented_differences(tokenizer, text, regex, treebank):
+	assert word_tokenize(text, preserve_line=True) == treebank
+	assert tokenizer.process(text) == regex
+
+@pytest.mark.parametrize("text", TREEBANK_SENTENCES)
+def test_covers_wordpunct_characters(tokenizer, text):
+	#No character is dropped: both tokenizations spell the same text once quotes are mapped back
+	tokens = [token.replace("``", '"').replace("''", '"') for token in tokenizer.process(text)]
+	assert "".join(tokens) == "".join(wordpunct_tokenize(text))
+
+def test_word_tokens_match_wordpunct(tokenizer):
+	text = "plain words 123 and more words"
+	assert tokenizer.process(text) == wordpunct_tokenize(text)
+
+def test_batch_matches_process(tokenizer):
+	assert tokenizer.process_batch(TREEBANK_SENTENCES) == [tokenizer.process(text) for text in TREEBANK_SENTENCES]
+
+def test_batch_fused_lowercase(tokenizer):
+	expected = [tokenizer.process(text.lower()) for text in TREEBANK_SENTENCES]
+	assert tokenizer.process_batch(TREEBANK_SENTENCES, lowercase=True) == expected
+
+def test_empty_input(tokenizer):
+	assert tokenizer.process("") == []
+	assert tokenizer.process_batch([]) == []
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from trainer.Trainer import Trainer
+from features.feature_store import FeatureStore
+
+MODELS = [{"name": "sgd", "type": "SGDClassifier", "module": "sklearn.linear_model", "params": {"random_state": 0}}]
+
+@pytest.fixture
+def data(tmp_path):
+	rng = np.random.RandomState(0)
+	X = rng.rand(3000, 10).astype(np.float32)
+	y = pd.DataFrame({"label": (X[:, 0] + 0.1 * rng.rand(3000) > 0.55).astype(int)})
+	store = FeatureStore.create(str(tmp_path / "features.npy"), len(X), X.shape[1])
+	store.write(0, X)
+	store.flush()
+	return store, X, y
+
+def test_streamed_fit_starts_fresh(data):
+	store, _, y = data
+	trainer = Trainer({"models": MODELS, "chunk_size": 500})
+	trainer.fit(store, y)
+	first = trainer.traineds[0].model
+	coef, steps = first.coef_.copy(), first.t_
+	trainer.fit(store, y)
+	second = trainer.traineds[0].model
+	assert second is not first
+	np.testing.assert_array_equal(second.coef_, coef)
+	assert second.t_ == steps
+	#The configured estimator itself is never fitted
+	assert not hasattr(trainer.models[0].trainer, "coef_")
+
+def test_streamed_fit_makes_several_passes(data):
+	store, X, y = data
+	trainer = Trainer({"models": MODELS, "chunk_size": 500, "stream_epochs": 3})
+	trainer.fit(store, y)
+	#t_ counts samples seen (plus one)
+	assert trainer.traineds[0].model.t_ == 3 * len(X) + 1
+
+def test_streamed_predictions_match_in_memory_model(data):
+	store, X, y = data
+	trainer = Trainer({"models": MODELS, "chunk_size": 500})
+	trainer.fit(store, y)
+	[predicted] = trainer.predict(store)
+	np.testing.assert_array_equal(predicted.predicted, trainer.traineds[0].model.predict(X))
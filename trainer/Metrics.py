@@ -2,17 +2,178 @@ import importlib
 import logging
 import collections
 import numpy as np
+import scipy.sparse as sp
 import sklearn.metrics
+import multiprocessing as mp
+from multiprocessing.pool import ThreadPool
+from sklearn.utils.multiclass import unique_labels
+from data_loader.util import label_indicator
+Metric = collections.namedtuple('Metric', 'label name function params')
+Estimate = collections.namedtuple('Estimate', 'value low high')
+
+def _divide(num, den):
+    den = np.asarray(den, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(den > 0, num / np.where(den > 0, den, 1.0), 0.0)
+
+def _fbeta(tp, fp, fn, beta):
+    beta2 = beta ** 2
+    return _divide((1 + beta2) * tp, (1 + beta2) * tp + beta2 * fn + fp)
+
+# Metrics that can be derived from per-class confusion counts (tp, fp, fn).
+_SCORES = {
+    'precision_score': lambda tp, fp, fn, params: _divide(tp, tp + fp),
+    'recall_score': lambda tp, fp, fn, params: _divide(tp, tp + fn),
+    'f1_score': lambda tp, fp, fn, params: _fbeta(tp, fp, fn, 1.0),
+    'fbeta_score': lambda tp, fp, fn, params: _fbeta(tp, fp, fn, params['beta']),
+    'jaccard_score': lambda tp, fp, fn, params: _divide(tp, tp + fp + fn),
+}
+_COUNT_PARAMS = {'average', 'beta', 'pos_label'}
+_AVERAGES = {'binary', 'micro', 'macro', 'weighted', None}
+
+class ConfusionCounts:
+    """Per-document confusion contributions of one model's predictions.
+
+    Rows of `matrix` hold the document's tp, fp and fn indicators for every class followed by 
+    a single exact-match indicator, so confusion counts of the whole test set (or of any 
+    bootstrap resample) are a single (weights @ matrix) product.
+    """
+    def __init__(self, y_true, y_pred, classes=None):
+        if classes is None:
+            self.classes = unique_labels(y_true, y_pred)
+            self.multilabel = False
+            true = self._one_hot(np.searchsorted(self.classes, np.asarray(y_true)))
+            pred = self._one_hot(np.searchsorted(self.classes, np.asarray(y_pred)))
+        else:
+            self.classes = np.asarray(classes)
+            self.multilabel = True
+            true = sp.csr_matrix(y_true, dtype=np.float64)
+            pred = sp.csr_matrix(y_pred, dtype=np.float64)
+        tp = true.multiply(pred).tocsr()
+        fp = pred - tp
+        fn = true - tp
+        exact = np.asarray((fp + fn).sum(axis=1)).ravel() == 0
+        self.size = true.shape[0]
+        self.matrix = sp.hstack([tp, fp, fn, sp.csr_matrix(exact.reshape(-1, 1), dtype=np.float64)]).tocsr()
+    def _one_hot(self, codes):
+        return sp.csr_matrix((np.ones(len(codes)), (np.arange(len(codes)), codes)), 
+            shape=(len(codes), len(self.classes)))
+    def counts(self, weights=None):
+        """Returns (tp, fp, fn, exact, total) counts, one row per row of `weights` (default: whole set)."""
+        if weights is None:
+            summed = np.asarray(self.matrix.sum(axis=0))
+            total = np.array([self.size], dtype=float)
+        else:
+            summed = np.asarray((weights @ self.matrix).todense())
+            total = np.asarray(weights.sum(axis=1)).ravel()
+        k = len(self.classes)
+        return summed[:, :k], summed[:, k:2 * k], summed[:, 2 * k:3 * k], summed[:, 3 * k], total
+    def score(self, metric, counts):
+        tp, fp, fn, exact, total = counts
+        if metric.name == 'accuracy_score':
+            return _divide(exact, total)
+        score = _SCORES[metric.name]
+        average = metric.params.get('average', 'binary')
+        if average == 'micro':
+            return score(tp.sum(axis=-1), fp.sum(axis=-1), fn.sum(axis=-1), metric.params)
+        if average == 'binary':
+            pos = np.searchsorted(self.classes, metric.params.get('pos_label', 1))
+            return score(tp[:, pos], fp[:, pos], fn[:, pos], metric.params)
+        per_class = score(tp, fp, fn, metric.params)
+        if average is None:
+            return per_class
+        if average == 'weighted':
+            weights = tp + fn
+        elif self.multilabel:
+            weights = np.ones_like(tp)
+        else:
+            # Like sklearn, macro averaging only covers labels present in y_true or y_pred.
+            weights = (tp + fp + fn) > 0
+        return _divide((per_class * weights).sum(axis=-1), weights.sum(axis=-1))
+
 class MetricEvaluator:
     def __init__(self, settings): 
         self.metricSettings = settings["metric"]
-        self.metric = getattr(sklearn.metrics, self.metricSettings["name"])
-    def _evaluate(self,params, y_pred):
+        self.single = isinstance(self.metricSettings, dict)
+        metricsSettings = [self.metricSettings] if self.single else self.metricSettings
+        self.metrics = [self._buildMetric(metric) for metric in metricsSettings]
+        labels = [metric.label for metric in self.metrics]
+        if len(set(labels)) != len(labels):
+            raise ValueError('Metric labels must be unique, set "label" to tell metrics apart: ' + str(labels))
+        self.bootstrap = settings.get("bootstrap")
+        # Kept for backward compatibility with single-metric settings.
+        self.metric = self.metrics[0].function
+    def _buildMetric(self,metric):
+        params = metric.get("params", {})
+        return Metric(metric.get("label", metric["name"]), metric["name"], getattr(sklearn.metrics, metric["name"]), params)
+    @staticmethod
+    def _fromCounts(metric, confusion):
+        if metric.name == 'accuracy_score':
+            return not metric.params
+        average = metric.params.get('average', 'binary')
+        if average == 'binary':
+            # Binary averaging needs a real binary target and an existing pos_label, otherwise sklearn raises.
+            return (metric.name in _SCORES and set(metric.params) <= _COUNT_PARAMS and not confusion.multilabel 
+                and len(confusion.classes) <= 2 and metric.params.get('pos_label', 1) in confusion.classes.tolist())
+        return metric.name in _SCORES and set(metric.params) <= _COUNT_PARAMS and average in _AVERAGES
+    def _y_true(self,test_set, y_pred):
+        if y_pred.classes is None:
+            return test_set.label
+        # Multi-label predictions are sparse indicator matrices, compare them with cached indicators.
+        y_true, _ = label_indicator(test_set, y_pred.classes)
+        return y_true
+    def _resamples(self, size):
+        """Yields bootstrap resamples as sparse (resamples x documents) multiplicity matrices."""
+        samples = self.bootstrap.get("samples", 1000)
+        rng = np.random.default_rng(self._seed)
+        # Bound the index matrix to a few million entries per chunk.
+        chunk = max(1, min(samples, 2 ** 22 // max(size, 1)))
+        for start in range(0, samples, chunk):
+            rows = min(chunk, samples - start)
+            indices = rng.integers(0, size, size=(rows, size))
+            weights = sp.csr_matrix((np.ones(indices.size), (np.repeat(np.arange(rows), size), indices.ravel())), 
+                shape=(rows, size))
+            yield indices, weights
+    def _interval(self, values):
+        alpha = (1 - self.bootstrap.get("confidence", 0.95)) / 2
+        values = np.concatenate(values)
+        return np.percentile(values, 100 * alpha, axis=0), np.percentile(values, 100 * (1 - alpha), axis=0)
+    def _evaluate(self,test_set, y_pred):
         logging.info('Evaluating '+ y_pred.name)
-        metric = self.metric(**{'y_pred':y_pred.predicted,**params})
-        return y_pred.name,metric
+        y_true = self._y_true(test_set, y_pred)
+        multilabel = y_pred.classes is not None
+        confusion = ConfusionCounts(y_true, y_pred.predicted, y_pred.classes)
+        fromCounts = [self._fromCounts(metric, confusion) for metric in self.metrics]
+        if not multilabel:
+            y_true = np.asarray(y_true)
+        # One shared confusion count for every metric that can be derived from it.
+        counts = confusion.counts()
+        results = collections.OrderedDict()
+        for metric, derived in zip(self.metrics, fromCounts):
+            if derived:
+                results[metric.label] = confusion.score(metric, counts)[0]
+            else:
+                results[metric.label] = metric.function(y_true=y_true, y_pred=y_pred.predicted, **metric.params)
+        if self.bootstrap:
+            resampled = collections.defaultdict(list)
+            for indices, weights in self._resamples(confusion.size):
+                counts = confusion.counts(weights)
+                for metric, derived in zip(self.metrics, fromCounts):
+                    if derived:
+                        resampled[metric.label].append(confusion.score(metric, counts))
+                    else:
+                        resampled[metric.label].append(np.array([metric.function(y_true=y_true[idx], 
+                            y_pred=y_pred.predicted[idx], **metric.params) for idx in indices]))
+            for label, value in results.items():
+                results[label] = Estimate(value, *self._interval(resampled[label]))
+        if self.single:
+            return y_pred.name,results[self.metrics[0].label]
+        return y_pred.name,results
     def evaluate(self,test_set, y_preds):
-        logging.info('Using '+ self.metricSettings["name"] + ' metric')
-        y_true = test_set.label
-        params= {'y_true':y_true,**self.metricSettings["params"]}
-        return [self._evaluate(params,y_pred) for y_pred in y_preds]
+        logging.info('Using '+ ', '.join(metric.label for metric in self.metrics) + ' metric')
+        # The same resamples are drawn for every model, so their intervals are comparable.
+        if self.bootstrap:
+            self._seed = self.bootstrap.get("random_state", np.random.SeedSequence().entropy)
+        # Models are evaluated in parallel threads, NumPy and SciPy release the GIL for the heavy lifting.
+        with ThreadPool(max(1, min(len(y_preds), mp.cpu_count()))) as pool:
+            return pool.starmap(self._evaluate, [(test_set, y_pred) for y_pred in y_preds])
@@ -2,14 +2,26 @@ import importlib
 import logging
 import collections
 import numpy as np
+import scipy.sparse as sp
+from sklearn.base import clone
+from sklearn.multiclass import OneVsRestClassifier
+from sklearn.utils import check_random_state
+from data_loader.util import is_multilabel, label_indicator
+from features.feature_store import FeatureStore
 Model = collections.namedtuple('Model', 'name trainer')
 Trained = collections.namedtuple('Trained', 'name model')
-Predicted = collections.namedtuple('Predicted', 'name predicted')
+Predicted = collections.namedtuple('Predicted', 'name predicted classes', defaults=(None,))
 
 class Trainer:
     def __init__(self, settings): 
         modelsSettings = settings["models"]
         self.models = []
+        self.classes = None
+        # Rows of a FeatureStore read into memory at a time.
+        self.chunkSize = settings.get("chunk_size", 10000)
+        # Exact number of partial_fit passes over a FeatureStore ("epochs" is taken by doc2vec).
+        # If not given, up to the estimator's own max_iter, stopping by its tol.
+        self.epochs = settings.get("stream_epochs")
         for model in modelsSettings:
             self.models.append(Model(model["name"],self._buildTrainer(model)))
     def _buildTrainer(self,model):
@@ -17,14 +29,84 @@ class Trainer:
         trainer = getattr(module, model["type"])
         my_instance = trainer(**model["params"])
         return my_instance
+    @staticmethod
+    def _stack(vector):
+        # Sparse feature matrices (e.g. bag-of-words) and feature stores are used as they are.
+        if sp.issparse(vector) or isinstance(vector, FeatureStore):
+            return vector
+        return np.vstack(vector.values)
+    def _inMemory(self,X):
+        # A feature store is read into memory at most once per fit, for all estimators that need it.
+        if not isinstance(X, FeatureStore):
+            return X
+        if self._loaded is None:
+            logging.info('Loading all features from '+ X.path)
+            self._loaded = X.load()
+        return self._loaded
+    def _partialFit(self,trainer,store,y):
+        # Like fit, iterate up to max_iter passes (estimators without one, e.g. naive Bayes, make a single pass),
+        # shuffling chunks if the estimator shuffles. Stopping follows sklearn's tol/n_iter_no_change rule on the
+        # training error of a pass, measured on every chunk before it is learned (partial_fit reports no loss).
+        # With stream_epochs set, exactly that many passes are made.
+        y = np.asarray(y)
+        classes = np.unique(y)
+        params = trainer.get_params()
+        epochs = self.epochs or params.get("max_iter") or 1
+        tol = None if self.epochs else params.get("tol")
+        patience = params.get("n_iter_no_change", 1)
+        rng = check_random_state(params.get("random_state")) if params.get("shuffle") else None
+        bestError, noImprovement = np.inf, 0
+        for epoch in range(epochs):
+            errors = 0.0
+            for start, X in store.chunks(self.chunkSize, rng):
+                yChunk = y[start:start + len(X)]
+                if rng is not None:
+                    order = rng.permutation(len(X))
+                    X, yChunk = X[order], yChunk[order]
+                if epoch > 0 and tol is not None:
+                    errors += (1 - trainer.score(X, yChunk)) * len(X)
+                trainer.partial_fit(X, yChunk, classes=classes)
+            if epoch > 0 and tol is not None:
+                error = errors / len(store)
+                noImprovement = noImprovement + 1 if error > bestError - tol else 0
+                bestError = min(bestError, error)
+                if noImprovement >= patience:
+                    break
+        logging.info('Streamed '+ str(epoch + 1) + ' of at most '+ str(epochs) + ' passes over '+ store.path)
+        return trainer
     def _train(self,model,X,y):
         logging.info('Training '+ model.name)
-        return model.trainer.fit(X,y)
+        trainer = model.trainer
+        if self.classes is not None:
+            # One binary problem per label, fitted in parallel across labels.
+            trainer = OneVsRestClassifier(trainer, n_jobs=-1)
+        elif isinstance(X, FeatureStore) and hasattr(trainer, 'partial_fit'):
+            # Stream the features chunk by chunk, into a fresh copy, as partial_fit would continue a fitted model.
+            return self._partialFit(clone(trainer),X,y)
+        return trainer.fit(self._inMemory(X),y)
     def fit(self,vector,set):
-        X = np.vstack(vector.values)
-        y = set.label
+        X = self._stack(vector)
+        if is_multilabel(set.label):
+            y, self.classes = label_indicator(set)
+            logging.info('Multi-label target with '+ str(len(self.classes)) + ' labels')
+        else:
+            y, self.classes = set.label, None
+        self._loaded = None
         self.traineds = [Trained(model.name,self._train(model,X,y)) for model in self.models]
+        self._loaded = None
+    @staticmethod
+    def _concatenate(parts):
+        if sp.issparse(parts[0]):
+            return sp.vstack(parts, format='csr')
+        return np.concatenate(parts)
     def predict(self, vector):
-        X = np.vstack(vector.values)
-        return [Predicted(trained.name,trained.model.predict(X)) for trained in self.traineds]
-     
\ No newline at end of file
+        X = self._stack(vector)
+        if isinstance(X, FeatureStore):
+            # Every chunk is read once and predicted by all the models.
+            parts = [[] for _ in self.traineds]
+            for _, chunk in X.chunks(self.chunkSize):
+                for part, trained in zip(parts, self.traineds):
+                    part.append(trained.model.predict(chunk))
+            return [Predicted(trained.name,self._concatenate(part),self.classes) for trained, part in zip(self.traineds, parts)]
+        return [Predicted(trained.name,trained.model.predict(X),self.classes) for trained in self.traineds]
+     